@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import JsonResponse
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SLOW_REQUEST_MS': 500,
+    'MAX_QUERIES': 50,
+    'SAMPLES': 200,
+}
+
+_current = ContextVar('request_sample', default=None)
+_samples = {}
+_requests = defaultdict(int)
+_lock = threading.Lock()
+
+
+def get_setting(name):
+    return getattr(settings, 'INSTRUMENTATION', {}).get(name, DEFAULTS[name])
+
+
+class RequestSample:
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.wall_ms = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_ms += (time.perf_counter() - start) * 1000
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_ms, 2),
+            'template_ms': round(self.template_ms, 2),
+            'wall_ms': round(self.wall_ms, 2),
+        }
+
+
+class QueryInstrumentationMiddleware:
+    """Record SQL query count, SQL time, template time and wall time per view.
+
+    Opt-in with ``INSTRUMENTATION = {'ENABLED': True}``. Requests over
+    ``SLOW_REQUEST_MS`` or ``MAX_QUERIES`` are logged as warnings, and the
+    last ``SAMPLES`` requests per view are kept for ``instrumentation_stats``.
+    """
+
+    def __init__(self, get_response):
+        if not get_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = RequestSample()
+        token = _current.set(sample)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample.record_query))
+                response = self.get_response(request)
+        finally:
+            sample.wall_ms = (time.perf_counter() - start) * 1000
+            _current.reset(token)
+
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        record(view_name, sample)
+
+        if sample.wall_ms > get_setting('SLOW_REQUEST_MS') or sample.queries > get_setting('MAX_QUERIES'):
+            logger.warning('%s %s (%s): %d queries, %.1f ms SQL, %.1f ms templates, %.1f ms total',
+                           request.method, request.path, view_name, sample.queries, sample.sql_ms,
+                           sample.template_ms, sample.wall_ms)
+        return response
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    # The regular Django template backend, timing top-level renders for the current request
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        sample = _current.get()
+        if sample is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.template_ms += (time.perf_counter() - start) * 1000
+
+
+def record(view_name, sample):
+    with _lock:
+        samples = _samples.setdefault(view_name, deque(maxlen=get_setting('SAMPLES')))
+        samples.append(sample.as_dict())
+        _requests[view_name] += 1
+
+
+def summary():
+    with _lock:
+        snapshot = {view_name: list(samples) for view_name, samples in _samples.items()}
+        requests = dict(_requests)
+
+    views = []
+    for view_name, samples in snapshot.items():
+        wall = sorted(sample['wall_ms'] for sample in samples)
+        views.append({
+            'view': view_name,
+            'requests': requests[view_name],
+            'samples': len(samples),
+            'avg_queries': round(sum(sample['queries'] for sample in samples) / len(samples), 1),
+            'max_queries': max(sample['queries'] for sample in samples),
+            'avg_sql_ms': round(sum(sample['sql_ms'] for sample in samples) / len(samples), 2),
+            'avg_template_ms': round(sum(sample['template_ms'] for sample in samples) / len(samples), 2),
+            'avg_wall_ms': round(sum(wall) / len(wall), 2),
+            'p95_wall_ms': wall[min(len(wall) - 1, int(len(wall) * 0.95))],
+            'max_wall_ms': wall[-1],
+        })
+    views.sort(key=lambda view: view['avg_wall_ms'], reverse=True)
+    return views
+
+
+@staff_member_required
+def instrumentation_stats(request):
+    return JsonResponse({'enabled': bool(get_setting('ENABLED')), 'views': summary()})
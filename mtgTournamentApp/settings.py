@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mtgTournamentApp.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -43,7 +44,8 @@ ROOT_URLCONF = 'mtgTournamentApp.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's template backend, with render timing for the instrumentation middleware
+        'BACKEND': 'mtgTournamentApp.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -66,6 +68,68 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Run on every new connection. WAL lets readers carry on while a result is being written,
+            # and synchronous=NORMAL only syncs at checkpoints, which is safe in WAL mode.
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=134217728;'  # 128 MB
+                'PRAGMA cache_size=-20000;'  # 20 MB
+            ),
+            'timeout': 20,  # Seconds a writer waits for the lock before "database is locked"
+            # Take the write lock when the transaction starts, so it waits in the busy handler
+            # instead of failing when a read transaction later tries to upgrade to a write
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Result entry views take a process-wide lock, see tournament.locks.serialize_writes
+SERIALIZE_WRITES = True
+
+# Request instrumentation
+# Opt-in per-view SQL query count, SQL time, template time and wall time. Requests over either
+# threshold are logged; rolling aggregates are served to staff at /instrumentation/.
+INSTRUMENTATION = {
+    'ENABLED': False,
+    'SLOW_REQUEST_MS': 500,
+    'MAX_QUERIES': 50,
+    'SAMPLES': 200,  # Requests kept per view for the aggregates
+}
+
+# Live tournament events (Server-Sent Events). Served through ASGI (mtgTournamentApp.asgi, e.g.
+# uvicorn mtgTournamentApp.asgi:application) each viewer holds one open stream on the event loop;
+# under WSGI each request is a long-poll instead. The in-process broker only reaches viewers
+# served by the same process; changes made elsewhere (the run_jobs worker, other web processes)
+# are noticed from the tournament version and reload the page. Point BROKER at a shared-broker
+# class to patch those in place too.
+TOURNAMENT_EVENTS = {
+    'BROKER': 'tournament.events.InProcessBroker',
+    'KEEPALIVE_SECONDS': 15,
+    'STREAM_SECONDS': 300,  # Streams are closed after this and the browser reconnects
+    'POLL_SECONDS': 25,  # Longest a WSGI long-poll waits for an event
+    'WATCH_SECONDS': 5,  # How often a quiet stream checks the tournament version
+    'HISTORY': 100,  # Events kept per tournament for reconnecting clients
+}
+
+# Files written by background jobs (exports), served by job_download
+JOB_OUTPUT_DIR = BASE_DIR / 'job_output'
+
+# A running job that has not reported progress for this long is taken to have lost its worker and is failed
+JOB_TIMEOUT_SECONDS = 900
+
+# Worker processes used to pair Draft pods concurrently (None: one per CPU)
+PAIRING_POOL_WORKERS = None
+
+# Cache
+# Standings payloads are keyed on a per-tournament version, so stale entries are never read.
+# Switch to django.core.cache.backends.filebased.FileBasedCache to share them between worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mtg-tournament',
+        'TIMEOUT': 3600,
     }
 }
 
@@ -107,6 +171,10 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Large events post one field per player (create form) and four per table (result forms),
+# well past Django's default limit of 1000
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 20000
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
 from homepage.views import HomepageView
+from .instrumentation import instrumentation_stats
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', HomepageView.as_view(), name='homepage'),
     path('tournament/', include('tournament.urls')),
     path('accounts/', include('users.urls')),  # Include users.urls under accounts path
+    path('instrumentation/', instrumentation_stats, name='instrumentation_stats'),
 ]
\ No newline at end of file
@@ -0,0 +1,147 @@
+from django.db import models, transaction
+
+from .leaderboard import bump_version
+from .locks import lock_tournament
+from .models import Bracket, Pairing, StandingsSnapshot
+from .standings import snapshot_standings
+
+SINGLE_ELIMINATION = 'Single Eliminations'
+
+TOP_CUT_SIZES = [4, 8, 16]
+
+
+def bracket_size(number_of_players):
+    # Next power of two, with room for at least one match
+    size = 2
+    while size < number_of_players:
+        size *= 2
+    return size
+
+
+def seed_order(size):
+    # Seeds in leaf order: 1 meets size, 2 meets size-1, and the top seeds meet as late as possible
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+
+def build_nodes(player_ids):
+    """Lay out a seeded bracket as a heap array, with byes already advanced.
+
+    ``player_ids`` is in seed order. Byes go to the top seeds, so no match is
+    ever bye against bye.
+    """
+    size = bracket_size(len(player_ids))
+    nodes = [None] * (2 * size)
+    for position, seed in enumerate(seed_order(size)):
+        if seed <= len(player_ids):
+            nodes[size + position] = player_ids[seed - 1]
+
+    for node in range(size // 2, size):
+        left, right = nodes[2 * node], nodes[2 * node + 1]
+        if left is None or right is None:
+            nodes[node] = left if right is None else right
+    return size, nodes
+
+
+def create_bracket(tournament, players):
+    # players in seed order
+    size, nodes = build_nodes([player.id for player in players])
+    with transaction.atomic():
+        Bracket.objects.filter(tournament=tournament).delete()
+        bracket = Bracket.objects.create(
+            tournament=tournament,
+            size=size,
+            nodes=nodes,
+            names={str(player.id): player.name for player in players}
+        )
+        bump_version(tournament)
+    return bracket
+
+
+def create_top_cut(tournament, size, reset=False):
+    """Seed a single-elimination bracket from the final Swiss standings.
+
+    The final round's standings snapshot is re-taken under the lock first, so
+    results corrected after the event ended are seeded too; that reads the
+    stored tiebreakers in order and recalculates nothing. An existing
+    bracket, with the winners recorded in it, is only replaced when
+    ``reset`` is given.
+    """
+    if size not in TOP_CUT_SIZES:
+        raise ValueError(f'A top cut must be one of {", ".join(map(str, TOP_CUT_SIZES))} players.')
+
+    with transaction.atomic():
+        lock_tournament(tournament)
+        if not reset and Bracket.objects.filter(tournament=tournament).exists():
+            raise ValueError('This tournament already has a top cut. Tick "Reset the bracket" to cut again.')
+        final_round = Pairing.objects.filter(tournament=tournament).aggregate(models.Max('round'))['round__max']
+        if final_round is None:
+            raise ValueError('The tournament has no rounds to cut from.')
+
+        snapshot_standings(tournament, final_round)
+        standings = (StandingsSnapshot.objects.filter(tournament=tournament, round=final_round)
+                     .select_related('player').order_by('position'))
+        seeds = [row.player for row in standings[:size]]
+        if len(seeds) < size:
+            raise ValueError(f'Only {len(seeds)} players are in the standings, not enough for a top {size}.')
+        return create_bracket(tournament, seeds)
+
+
+def record_winner(bracket, node, winner_id):
+    """Set the winner of the match at ``node``; the winner advances by being stored there.
+
+    Changing an earlier result clears the later matches it fed into, which
+    only walks up the path to the final.
+    """
+    if not 1 <= node < bracket.size:
+        raise ValueError(f'There is no match at node {node}.')
+    nodes = bracket.nodes
+    players = (nodes[2 * node], nodes[2 * node + 1])
+    if None in players:
+        raise ValueError('This match is still waiting for an earlier result.')
+    if winner_id not in players:
+        raise ValueError('The winner must be one of the two players of the match.')
+
+    previous = nodes[node]
+    nodes[node] = winner_id
+    if previous is not None and previous != winner_id:
+        parent = node // 2
+        while parent:
+            nodes[parent] = None
+            parent //= 2
+    bracket.save(update_fields=['nodes'])
+
+
+def bracket_rounds(bracket):
+    # Matches per round, first round first; byes are not shown as matches
+    rounds = []
+    width = bracket.size // 2
+    while width:
+        matches = []
+        for node in range(width, 2 * width):
+            player1, player2 = bracket.nodes[2 * node], bracket.nodes[2 * node + 1]
+            if width == bracket.size // 2 and (player1 is None or player2 is None):
+                continue
+            matches.append({
+                'node': node,
+                'player1': _entry(bracket, player1),
+                'player2': _entry(bracket, player2),
+                'winner': bracket.nodes[node],
+            })
+        rounds.append(matches)
+        width //= 2
+    return rounds
+
+
+def champion(bracket):
+    winner = bracket.nodes[1]
+    return _entry(bracket, winner)
+
+
+def _entry(bracket, player_id):
+    if player_id is None:
+        return None
+    return {'id': player_id, 'name': bracket.names.get(str(player_id), '')}
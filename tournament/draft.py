@@ -0,0 +1,81 @@
+import random
+from collections import defaultdict
+
+from .models import Player
+
+
+def is_draft(tournament):
+    return tournament.tournament_type == 'Draft'
+
+
+def is_pod_event(tournament):
+    return is_draft(tournament) and tournament.pods > 1
+
+
+def assign_pods(tournament, players):
+    """Spread players over the tournament's pods, balanced by seed.
+
+    ``players`` is in seed order (entry order at creation, standings order
+    later). Pods are sized in pairs, so an even field gets only even pods
+    and an odd field a single odd one: no pod hands out a bye it could
+    avoid. Seeds are then dealt out snake-style, 1..n then n..1, skipping
+    full pods, so every pod gets a similar mix of strong and weak seeds.
+    Only sets ``pod`` on the players; nothing is saved.
+    """
+    pod_count = max(1, min(tournament.pods, len(players) // 2))
+    pairs, odd = divmod(len(players), 2)
+    sizes = [2 * (pairs // pod_count + (pod < pairs % pod_count)) for pod in range(pod_count)]
+    sizes[-1] += odd  # The last pod is never larger than the others before this
+
+    filled = [0] * pod_count
+    deal = _snake(pod_count)
+    for player in players:
+        pod = next(pod for pod in deal if filled[pod] < sizes[pod])
+        filled[pod] += 1
+        player.pod = pod + 1
+    return pod_count
+
+
+def _snake(pod_count):
+    # Pod indexes 0..n-1, n-1..0, over and over
+    while True:
+        yield from range(pod_count)
+        yield from reversed(range(pod_count))
+
+
+def seat_players(tournament, players, rng=random):
+    """Assign pods and seats for a Draft and save both in one batch.
+
+    Seats inside each pod are shuffled with ``rng``; pass a seeded
+    ``random.Random`` for a reproducible seating. Runs in linear time over
+    the player list. Returns the players of each pod in seat order.
+    """
+    assign_pods(tournament, players)
+
+    pods = defaultdict(list)
+    for player in players:
+        pods[player.pod].append(player)
+    for members in pods.values():
+        rng.shuffle(members)
+        for seat, player in enumerate(members, start=1):
+            player.seat = seat
+
+    Player.objects.bulk_update(players, ['pod', 'seat'], batch_size=500)
+    return [pods[pod] for pod in sorted(pods)]
+
+
+def cross_table_pairings(pods):
+    """First-round pairings from the seating: everyone plays the seat across the table.
+
+    In a pod of eight, seat 1 plays seat 5, seat 2 plays seat 6 and so on. An
+    odd pod's last seat gets the bye. ``pods`` is the output of
+    ``seat_players``.
+    """
+    pairings = []
+    byes = []
+    for members in pods:
+        half = len(members) // 2
+        pairings.extend((members[i].id, members[i + half].id) for i in range(half))
+        if len(members) % 2:
+            byes.append((members[-1].id, None))
+    return pairings + byes
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from itertools import count
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Tournament
+
+DEFAULTS = {
+    'BROKER': 'tournament.events.InProcessBroker',
+    'KEEPALIVE_SECONDS': 15,
+    'STREAM_SECONDS': 300,
+    'POLL_SECONDS': 25,
+    'WATCH_SECONDS': 5,
+    'HISTORY': 100,
+}
+
+# How long the browser waits before reconnecting once a stream or long-poll ends
+RETRY_MILLISECONDS = 1000
+
+# How long a stream that found the version ahead of it waits for this process's own event before
+# calling it a change from elsewhere; events are published straight after their commit
+CHANGE_GRACE_SECONDS = 1
+
+ROUND_POSTED = 'round'
+RESULT_REPORTED = 'result'
+STANDINGS_UPDATED = 'standings'
+# Sent by the stream itself when the tournament changed without an event reaching this process
+CHANGED = 'changed'
+
+# Standings fields sent for each changed player, in this order
+STANDINGS_FIELDS = ['id', 'match_points', 'wins', 'losses', 'draws', 'opponents_match_win_percentage',
+                    'game_win_percentage', 'opponents_game_win_percentage']
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_setting(name):
+    return getattr(settings, 'TOURNAMENT_EVENTS', {}).get(name, DEFAULTS[name])
+
+
+class Event:
+    def __init__(self, id, name, data):
+        self.id = id
+        self.name = name
+        self.data = data
+
+    def encode(self):
+        # One Server-Sent Events message
+        return f'id: {self.id}\nevent: {self.name}\ndata: {json.dumps(self.data, separators=(",", ":"))}\n\n'
+
+
+class Subscriber:
+    # An asyncio queue on the stream's event loop that any thread can put events into
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+        except RuntimeError:
+            pass  # The stream's event loop has already closed
+
+
+class InProcessBroker:
+    """Fan tournament events out to the subscribers of this process.
+
+    Every subscriber gets its own queue, and the last ``HISTORY`` events of
+    each tournament are kept so a reconnecting client can catch up from its
+    ``Last-Event-ID``. Events are published from request threads and
+    awaited on the streams' event loop. Only viewers served by the same
+    process see an event, so a multi-process deployment should point
+    ``TOURNAMENT_EVENTS['BROKER']`` at a broker class backed by a shared
+    service, with the same ``publish``/``subscribe``/``unsubscribe`` methods
+    and an async ``listen``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = count(1)
+        self.subscribers = {}
+        self.history = {}
+
+    def publish(self, tournament_id, name, data):
+        with self.lock:
+            event = Event(next(self.ids), name, data)
+            self.history.setdefault(tournament_id, deque(maxlen=get_setting('HISTORY'))).append(event)
+            subscribers = list(self.subscribers.get(tournament_id, ()))
+        for subscriber in subscribers:
+            subscriber.put(event)
+        return event
+
+    def subscribe(self, tournament_id, last_event_id=None):
+        # Called from the stream's event loop
+        subscriber = Subscriber()
+        with self.lock:
+            self.subscribers.setdefault(tournament_id, set()).add(subscriber)
+            if last_event_id is not None:
+                for event in self.history.get(tournament_id, ()):
+                    if event.id > last_event_id:
+                        subscriber.queue.put_nowait(event)
+        return subscriber
+
+    def unsubscribe(self, tournament_id, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(tournament_id, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self.subscribers.pop(tournament_id, None)
+
+    async def listen(self, subscriber, timeout):
+        # The next event, or None once ``timeout`` seconds pass without one
+        try:
+            return await asyncio.wait_for(subscriber.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(get_setting('BROKER'))()
+        return _broker
+
+
+def publish(tournament_id, name, data):
+    # Viewers only hear about a write once it is committed
+    transaction.on_commit(lambda: get_broker().publish(tournament_id, name, data))
+
+
+def publish_round(tournament, round_number, pairings):
+    publish(tournament.id, ROUND_POSTED, {
+        'version': tournament.version,
+        'round': round_number,
+        'pairings': [[pairing.id, pairing.player1_id, pairing.player2_id] for pairing in pairings],
+    })
+
+
+def publish_results(tournament, pairings, players):
+    # Compact diffs: the changed pairings' scores, then the standings rows that moved
+    if pairings:
+        publish(tournament.id, RESULT_REPORTED, {
+            'version': tournament.version,
+            'pairings': [[pairing.id, pairing.round, pairing.player1_score, pairing.player2_score]
+                         for pairing in pairings],
+        })
+    if players:
+        publish(tournament.id, STANDINGS_UPDATED, {
+            'version': tournament.version,
+            'fields': STANDINGS_FIELDS,
+            'players': [[getattr(player, field) for field in STANDINGS_FIELDS] for player in players],
+        })
+
+
+async def event_stream(tournament_id, last_event_id=None, version=None, seconds=None):
+    """Yield Server-Sent Events for one tournament until ``seconds`` (default ``STREAM_SECONDS``) pass.
+
+    An async generator, so under ASGI a waiting viewer costs a queue on the
+    event loop rather than a worker thread. Writes made in another process,
+    such as a round paired by the run_jobs worker, never reach this
+    process's broker, so every ``WATCH_SECONDS`` of silence the stream also
+    reads the tournament's version. If it is past ``version`` (the one the
+    viewer's page was rendered at) and past every event sent, a ``changed``
+    event tells the page to reload. A comment line goes out every
+    ``KEEPALIVE_SECONDS`` of silence to keep proxies from closing the
+    connection; the browser reconnects on its own once the stream ends and
+    resumes from the last event it saw.
+    """
+    broker = get_broker()
+    subscriber = broker.subscribe(tournament_id, last_event_id)
+    keepalive = get_setting('KEEPALIVE_SECONDS')
+    watch = get_setting('WATCH_SECONDS')
+    now = time.monotonic()
+    deadline = now + (seconds or get_setting('STREAM_SECONDS'))
+    quiet_since = now
+    # Seen ahead of the viewer once already: it may only be an event still on its way from this process
+    behind = False
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        while (remaining := deadline - time.monotonic()) > 0:
+            event = await broker.listen(subscriber, min(CHANGE_GRACE_SECONDS if behind else watch, remaining))
+            if event is not None:
+                version = max(version or 0, event.data.get('version', 0))
+                quiet_since = time.monotonic()
+                yield event.encode()
+                continue
+
+            current = await Tournament.objects.filter(id=tournament_id).values_list('version', flat=True).afirst()
+            if current is not None and version is not None and current > version:
+                if behind:
+                    version, behind = current, False
+                    quiet_since = time.monotonic()
+                    yield f'event: {CHANGED}\ndata: {json.dumps({"version": current})}\n\n'
+                    continue
+                behind = True
+            else:
+                behind = False
+            if time.monotonic() - quiet_since >= keepalive:
+                quiet_since = time.monotonic()
+                yield ': keepalive\n\n'
+    finally:
+        broker.unsubscribe(tournament_id, subscriber)
+
+
+async def poll_events(tournament_id, last_event_id=None, version=None):
+    """The events of one long-poll: the first to arrive within ``POLL_SECONDS``, as a single body.
+
+    For WSGI servers, where an open stream would hold a worker thread for
+    as long as the viewer stays; the browser reconnects for the next one.
+    """
+    chunks = []
+    stream = event_stream(tournament_id, last_event_id, version, get_setting('POLL_SECONDS'))
+    try:
+        async for chunk in stream:
+            if chunk.startswith(':'):
+                continue  # Nothing to keep alive, the response ends with the first event
+            chunks.append(chunk)
+            if not chunk.startswith('retry: '):
+                break
+    finally:
+        await stream.aclose()
+    return ''.join(chunks)
@@ -0,0 +1,92 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Pairing, Player, ResultChange
+from .standings import STANDINGS_ORDER
+
+# Rows are fetched from the database in chunks of this size while streaming
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+STANDINGS_COLUMNS = ['tournament', 'position', 'name', 'match_points', 'wins', 'losses', 'draws',
+                     'game_win_percentage', 'opponents_match_win_percentage', 'opponents_game_win_percentage']
+
+PAIRINGS_COLUMNS = ['tournament', 'round', 'table', 'player1', 'player2', 'player1_score', 'player2_score',
+                    'was_bye']
+
+HISTORY_COLUMNS = ['tournament', 'round', 'player1', 'player2', 'previous_player1_score',
+                   'previous_player2_score', 'player1_score', 'player2_score', 'created_at']
+
+
+def standings_rows(tournament):
+    players = (Player.objects.filter(tournament=tournament).order_by(*STANDINGS_ORDER)
+               .values_list(*STANDINGS_COLUMNS[2:]))
+    for position, row in enumerate(players.iterator(chunk_size=CHUNK_SIZE), start=1):
+        yield (tournament.id, position) + row
+
+
+def pairings_rows(tournament, round_number=None):
+    pairings = Pairing.objects.filter(tournament=tournament)
+    if round_number is not None:
+        pairings = pairings.filter(round=round_number)
+    pairings = pairings.order_by('round', 'id').values_list(
+        'round', 'player1__name', 'player2__name', 'player1_score', 'player2_score', 'was_bye'
+    )
+
+    current_round, table = None, 0
+    for row in pairings.iterator(chunk_size=CHUNK_SIZE):
+        table = table + 1 if row[0] == current_round else 1
+        current_round = row[0]
+        yield (tournament.id, row[0], table) + row[1:]
+
+
+def history_rows(tournament):
+    # Every result ever entered or corrected, oldest first
+    changes = ResultChange.objects.filter(tournament=tournament).order_by('id').values_list(
+        'round', 'pairing__player1__name', 'pairing__player2__name', 'previous_player1_score',
+        'previous_player2_score', 'player1_score', 'player2_score', 'created_at'
+    )
+    for row in changes.iterator(chunk_size=CHUNK_SIZE):
+        yield (tournament.id,) + row
+
+
+EXPORTS = {
+    'standings': (STANDINGS_COLUMNS, standings_rows),
+    'pairings': (PAIRINGS_COLUMNS, pairings_rows),
+    'history': (HISTORY_COLUMNS, history_rows),
+}
+
+
+class Echo:
+    # A file-like object for csv.writer that hands each written line straight back
+    def write(self, value):
+        return value
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_json(columns, rows):
+    # A JSON array of objects, written one row at a time
+    yield '['
+    separator = '\n'
+    for row in rows:
+        yield separator + json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def stream_export(export_format, columns, rows):
+    if export_format == 'json':
+        return stream_json(columns, rows)
+    return stream_csv(columns, rows)
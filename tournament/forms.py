@@ -20,6 +20,9 @@
 #         model = Player
 #         fields = ['name']
 
+import csv
+import io
+
 from django import forms
 from .models import Tournament, Player
 
@@ -39,4 +42,46 @@ class TournamentForm(forms.ModelForm):
 class PlayerForm(forms.ModelForm):
     class Meta:
         model = Player
-        fields = ['name']
\ No newline at end of file
+        fields = ['name']
+
+class BulkPlayerForm(forms.Form):
+    names = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 10, 'placeholder': 'One player per line'})
+    )
+    csv_file = forms.FileField(
+        required=False,
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control-file', 'accept': '.csv,text/csv'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        lines = (cleaned_data.get('names') or '').splitlines()
+
+        csv_file = cleaned_data.get('csv_file')
+        if csv_file:
+            try:
+                rows = [row[0] for row in csv.reader(io.TextIOWrapper(csv_file, encoding='utf-8-sig')) if row]
+            except (UnicodeDecodeError, csv.Error):
+                raise forms.ValidationError("The uploaded file is not a readable UTF-8 CSV file.")
+            if rows and rows[0].strip().casefold() == 'name':
+                rows = rows[1:]  # Header row
+            lines.extend(rows)
+
+        # Collapse whitespace and drop duplicates (case-insensitive), keeping the first spelling
+        max_length = Player._meta.get_field('name').max_length
+        player_names = []
+        seen = set()
+        for line in lines:
+            name = ' '.join(line.split())
+            if not name or name.casefold() in seen:
+                continue
+            if len(name) > max_length:
+                raise forms.ValidationError(f'"{name[:20]}..." is longer than {max_length} characters.')
+            seen.add(name.casefold())
+            player_names.append(name)
+
+        if not player_names:
+            raise forms.ValidationError("Paste at least one player name or upload a CSV file.")
+        cleaned_data['player_names'] = player_names
+        return cleaned_data
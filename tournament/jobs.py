@@ -0,0 +1,146 @@
+import os
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .export import EXPORTS, FORMATS, stream_export
+from .leaderboard import bump_version
+from .models import Job, Pairing
+from .pairing import create_new_round
+from .standings import update_standings
+
+PAIR_ROUND = 'pair_round'
+RECOMPUTE_STANDINGS = 'recompute_standings'
+EXPORT = 'export'
+
+# Progress is written at most once per this many exported rows
+EXPORT_PROGRESS_ROWS = 5000
+
+
+def enqueue(tournament, kind, arguments=None):
+    """Queue a job, or return the one of the same kind already waiting or running for the tournament.
+
+    Pairing twice because of a double click would pair two rounds, so an
+    unfinished job of the same kind is reused rather than queued again.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind {kind!r}.')
+    arguments = arguments or {}
+    fail_stale()
+    with transaction.atomic():
+        job = (Job.objects.filter(tournament=tournament, kind=kind, arguments=arguments,
+                                  status__in=[Job.QUEUED, Job.RUNNING]).order_by('id').first())
+        if job is None:
+            job = Job.objects.create(tournament=tournament, kind=kind, arguments=arguments)
+    return job
+
+
+def fail_stale():
+    """Fail running jobs that sent no heartbeat for ``JOB_TIMEOUT_SECONDS``.
+
+    Claiming a job and every ``report`` are heartbeats, so a long export
+    that keeps reporting stays running. A silent job's worker has died,
+    and the job would otherwise be reused by ``enqueue`` forever. It is
+    failed rather than queued again: a round paired just before the worker
+    died must not be paired a second time.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS)
+    return (Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff)
+            .update(status=Job.FAILED, finished_at=now,
+                    error='The worker running this job stopped before finishing it. Start it again.'))
+
+
+def claim_next():
+    # The oldest queued job, marked running; the conditional update keeps two workers off the same job
+    fail_stale()
+    for job in Job.objects.filter(status=Job.QUEUED).order_by('id')[:10]:
+        now = timezone.now()
+        if Job.objects.filter(id=job.id, status=Job.QUEUED).update(status=Job.RUNNING, started_at=now,
+                                                                   heartbeat_at=now):
+            job.status, job.started_at, job.heartbeat_at = Job.RUNNING, now, now
+            return job
+    return None
+
+
+def run(job):
+    try:
+        result = JOB_HANDLERS[job.kind](job)
+    except Exception:
+        job.status = Job.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.status = Job.DONE
+        job.progress = 100
+        job.result = result
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'progress', 'result', 'output_path', 'message', 'finished_at'])
+    return job
+
+
+def report(job, progress, message=''):
+    # Visible to pollers straight away, even while the job's own transaction is still open elsewhere,
+    # and a heartbeat that keeps fail_stale off the job
+    now = timezone.now()
+    job.progress, job.message, job.heartbeat_at = progress, message, now
+    Job.objects.filter(id=job.id).update(progress=progress, message=message, heartbeat_at=now)
+
+
+def pair_round(job):
+    tournament = job.tournament
+    report(job, 10, 'Pairing the next round')
+    create_new_round(tournament)
+    tournament.refresh_from_db(fields=['is_ended'])
+    current_round = Pairing.objects.filter(tournament=tournament).aggregate(models.Max('round'))['round__max']
+    job.message = 'Tournament ended' if tournament.is_ended else f'Round {current_round} paired'
+    return {'round': current_round, 'is_ended': tournament.is_ended}
+
+
+def recompute_standings(job):
+    tournament = job.tournament
+    report(job, 10, 'Recomputing tiebreakers')
+    with transaction.atomic():
+        players = update_standings(tournament)
+        bump_version(tournament)
+    job.message = f'{len(players)} players updated'
+    return {'players': len(players)}
+
+
+def export(job):
+    tournament = job.tournament
+    kind = job.arguments.get('kind')
+    export_format = job.arguments.get('format', 'csv')
+    if kind not in EXPORTS or export_format not in FORMATS:
+        raise ValueError(f'Unknown export {kind!r} as {export_format!r}.')
+
+    os.makedirs(settings.JOB_OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(settings.JOB_OUTPUT_DIR, f'job_{job.id}_tournament_{tournament.id}_{kind}.{export_format}')
+    total = {
+        'standings': lambda: tournament.players.count(),
+        'pairings': lambda: Pairing.objects.filter(tournament=tournament).count(),
+        'history': lambda: tournament.result_changes.count(),
+    }[kind]()
+
+    columns, rows = EXPORTS[kind]
+
+    def counted(rows):
+        for written, row in enumerate(rows, start=1):
+            if written % EXPORT_PROGRESS_ROWS == 0:
+                report(job, min(99, written * 100 // max(total, 1)), f'{written} of {total} rows')
+            yield row
+
+    with open(path, 'w', newline='') as f:
+        f.writelines(stream_export(export_format, columns, counted(rows(tournament))))
+    job.output_path = path
+    job.message = f'{total} rows exported'
+    return {'rows': total, 'filename': os.path.basename(path)}
+
+
+JOB_HANDLERS = {
+    PAIR_ROUND: pair_round,
+    RECOMPUTE_STANDINGS: recompute_standings,
+    EXPORT: export,
+}
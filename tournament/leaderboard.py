@@ -0,0 +1,100 @@
+from django.contrib import messages
+from django.core.cache import cache
+from django.db.models import Count, F, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import Pairing, Tournament
+from .standings import STANDINGS_ORDER
+
+PLAYER_FIELDS = ['id', 'name', 'match_points', 'wins', 'losses', 'draws', 'game_win_percentage',
+                 'opponents_match_win_percentage', 'opponents_game_win_percentage']
+
+
+def bump_version(tournament):
+    # Every cached payload is keyed on the version, so bumping it retires them all at once
+    now = timezone.now()
+    Tournament.objects.filter(id=tournament.id).update(version=F('version') + 1, last_modified=now)
+    tournament.version += 1
+    tournament.last_modified = now
+
+
+def leaderboard_key(tournament):
+    return f'tournament:{tournament.id}:leaderboard:{tournament.version}'
+
+
+def get_leaderboard(tournament):
+    """Standings and pairings of a tournament, served from the cache until the next write."""
+    return cache.get_or_set(leaderboard_key(tournament), lambda: build_leaderboard(tournament))
+
+
+def conditional_render(request, etag, last_modified, render):
+    """Answer 304 Not Modified when the client's copy is current, else call ``render``.
+
+    ``etag`` and ``last_modified`` must change whenever the page would, which
+    for tournament pages is the version and its timestamp. Pages are
+    per-user (navbar, CSRF token), so the user is part of the ETag, and a
+    page with a flash message waiting is always rendered in full.
+    """
+    if len(messages.get_messages(request)):
+        return render()
+
+    etag = quote_etag(f'{etag}-u{request.user.pk or 0}')
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render()
+    response.headers.setdefault('ETag', etag)
+    if last_modified:
+        response.headers.setdefault('Last-Modified', http_date(last_modified))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def tournament_etag(tournament):
+    return f't{tournament.id}-v{tournament.version}'
+
+
+def build_leaderboard(tournament):
+    players = list(tournament.players.order_by(*STANDINGS_ORDER).values(*PLAYER_FIELDS))
+    current_round = Pairing.objects.filter(tournament=tournament).aggregate(Max('round'))['round__max']
+
+    return {
+        'players': players,
+        'current_round': current_round or 0,
+    }
+
+
+def round_pairings(tournament, round_number):
+    pairings = (Pairing.objects.filter(tournament=tournament, round=round_number).order_by('id')
+                .values('id', 'player1_id', 'player1__name', 'player2_id', 'player2__name',
+                        'player1_score', 'player2_score', 'results_submitted'))
+    rows = []
+    for pairing in pairings:
+        player2 = None
+        if pairing['player2_id'] is not None:
+            player2 = {'id': pairing['player2_id'], 'name': pairing['player2__name']}
+        rows.append({
+            'id': pairing['id'],
+            'player1': {'id': pairing['player1_id'], 'name': pairing['player1__name']},
+            'player2': player2,
+            'player1_score': pairing['player1_score'],
+            'player2_score': pairing['player2_score'],
+            'results_submitted': pairing['results_submitted'],
+        })
+    return rows
+
+
+def round_stamp(tournament, round_number):
+    """Identify the current state of one round's rows, for keying its cached fragment.
+
+    Every result change is logged in ``ResultChange`` and ids are never
+    reused, so the round's pairing count, its newest pairing and its newest
+    change only move when that round does. Writes to other rounds leave
+    closed rounds cached.
+    """
+    stamp = (Pairing.objects.filter(tournament=tournament, round=round_number)
+             .aggregate(pairings=Count('id', distinct=True), last_pairing=Max('id'),
+                        last_change=Max('result_changes__id')))
+    return '{pairings}-{last_pairing}-{last_change}'.format(**stamp)
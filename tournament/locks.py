@@ -0,0 +1,39 @@
+import threading
+from functools import wraps
+
+from django.conf import settings
+
+from .models import Tournament
+
+_write_lock = threading.Lock()
+
+
+def serialize_writes(view):
+    """Let only one POST through ``view`` (and every other decorated view) at a time.
+
+    SQLite allows a single writer. Without this, concurrent result entries
+    from one process all open a transaction and then spin in SQLite's busy
+    handler, which backs off in growing sleeps and eventually gives up
+    with "database is locked". Waiting on a lock here instead hands the
+    database to the next writer as soon as the previous one commits.
+    Writers in other processes are still covered by the busy timeout.
+    Turned off with ``SERIALIZE_WRITES = False``.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST' or not getattr(settings, 'SERIALIZE_WRITES', True):
+            return view(request, *args, **kwargs)
+        with _write_lock:
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def lock_tournament(tournament):
+    """Lock the tournament's row until the surrounding transaction ends.
+
+    Every write to a tournament's results or pairings takes this first, so
+    writers to the same tournament queue up while other tournaments carry
+    on. On SQLite, where ``select_for_update`` does nothing, the IMMEDIATE
+    transaction already holds the database write lock.
+    """
+    list(Tournament.objects.select_for_update().filter(id=tournament.id).values_list('id', flat=True))
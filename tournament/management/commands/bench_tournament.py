@@ -0,0 +1,203 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from tournament.models import Pairing, Tournament
+from tournament.pairing import create_new_round
+
+MIN_PLAYERS = 64
+MAX_PLAYERS = 10000
+
+# Best-of-3 outcomes a synthetic match can end in
+SCORES = [(2, 0), (2, 1), (1, 2), (0, 2), (1, 1)]
+
+
+class Command(BaseCommand):
+    help = ('Benchmark tournament creation, round pairing, result submission and the leaderboard '
+            'on synthetic events in a scratch SQLite database, and report each phase as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, nargs='+', default=[64, 256, 1024],
+                            help=f'Event sizes to generate ({MIN_PLAYERS} to {MAX_PLAYERS} players).')
+        parser.add_argument('--rounds', type=int,
+                            help='Swiss rounds to play (default: the number the event size calls for).')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for player order, pairings and results.')
+        parser.add_argument('--database', help='Scratch SQLite file to use (default: a temporary file).')
+        parser.add_argument('--no-memory', action='store_true',
+                            help='Skip peak memory tracking, which slows down the timed code.')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+        parser.add_argument('--writers', type=int, default=0,
+                            help='Also report the last round through the result API from this many concurrent '
+                                 'clients, one match per request, like scorekeepers at the end of a round.')
+
+    def handle(self, *args, **options):
+        for size in options['players']:
+            if not MIN_PLAYERS <= size <= MAX_PLAYERS:
+                raise CommandError(f'--players must be between {MIN_PLAYERS} and {MAX_PLAYERS}, got {size}.')
+
+        self.track_memory = not options['no_memory']
+        self.writers = options['writers']
+        with scratch_database(options['database']):
+            report = [self.run_event(size, options['rounds'], options['seed']) for size in options['players']]
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def run_event(self, size, rounds, seed):
+        random.seed(seed)
+        client = Client()
+        phases = {'create_tournament': [], 'pair_round': [], 'update_results': [], 'tournament_players': []}
+
+        response, stats = self.measure(client.post, reverse('create_tournament'), {
+            'name': f'Bench {size}',
+            'tournament_type': 'Constructed',
+            'pairing_method': 'Swiss',
+            'best_of': 3,
+            'set': 'Bench',
+            'pods': 1,
+            'players': [f'Player {i}' for i in range(size)],
+        })
+        if response.status_code != 302:
+            raise CommandError(f'create_tournament returned {response.status_code}')
+        phases['create_tournament'].append(stats)
+
+        tournament = Tournament.objects.latest('id')
+        rounds = min(rounds or tournament.number_of_rounds, tournament.number_of_rounds)
+
+        for round_number in range(1, rounds + 1):
+            if round_number > 1:
+                _, stats = self.measure(create_new_round, tournament)
+                phases['pair_round'].append(dict(stats, round=round_number))
+
+            url = reverse('update_results', args=[tournament.id])
+            _, stats = self.measure(client.post, url, result_form(tournament, round_number))
+            phases['update_results'].append(dict(stats, round=round_number))
+
+            url = reverse('tournament_players', args=[tournament.id])
+            _, stats = self.measure(client.get, url)
+            phases['tournament_players'].append(dict(stats, round=round_number))
+
+        if self.writers:
+            phases['concurrent_results'] = [self.concurrent_results(tournament, rounds)]
+
+        return {'players': size, 'rounds': rounds, 'seed': seed, 'phases': phases}
+
+    def concurrent_results(self, tournament, round_number):
+        # Every match of the round is reported again (with a new score) by one of the writers
+        pairing_ids = list(Pairing.objects.filter(tournament=tournament, round=round_number, player2__isnull=False)
+                           .order_by('id').values_list('id', flat=True))
+        url = reverse('submit_match_results', args=[tournament.id])
+        latencies = []
+        errors = []
+
+        def writer(ids):
+            client = Client()
+            try:
+                for pairing_id in ids:
+                    score1, score2 = random.choice(SCORES)
+                    body = json.dumps({'pairing': pairing_id, 'player1_score': score1, 'player2_score': score2})
+                    start = time.perf_counter()
+                    try:
+                        response = client.post(url, body, content_type='application/json')
+                    except Exception as e:
+                        errors.append(str(e))
+                        continue
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        errors.append(f'HTTP {response.status_code}')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer, args=(pairing_ids[i::self.writers],)) for i in range(self.writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            'round': round_number,
+            'writers': self.writers,
+            'requests': len(pairing_ids),
+            'errors': len(errors),
+            'error_samples': sorted(set(errors))[:5],
+            'wall_ms': round(wall_time * 1000, 2),
+            'requests_per_second': round(len(pairing_ids) / wall_time, 1),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+            'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else None,
+        }
+
+    def measure(self, function, *args):
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        if self.track_memory:
+            tracemalloc.start()
+        try:
+            with connection.execute_wrapper(count_queries):
+                start = time.perf_counter()
+                result = function(*args)
+                wall_time = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if self.track_memory else None
+        finally:
+            if self.track_memory:
+                tracemalloc.stop()
+
+        stats = {'wall_ms': round(wall_time * 1000, 2), 'queries': len(queries)}
+        if peak is not None:
+            stats['peak_memory_kb'] = round(peak / 1024, 1)
+        return result, stats
+
+
+def result_form(tournament, round_number):
+    # The same fields tournament_players.html posts for one round
+    data = {}
+    pairings = Pairing.objects.filter(tournament=tournament, round=round_number).order_by('id')
+    for i, (player1_id, player2_id) in enumerate(pairings.values_list('player1_id', 'player2_id'), start=1):
+        score1, score2 = random.choice(SCORES) if player2_id else (2, 0)
+        data[f'player1_id_{round_number}_{i}'] = player1_id
+        if player2_id:
+            data[f'player2_id_{round_number}_{i}'] = player2_id
+        data[f'score1_{round_number}_{i}'] = score1
+        data[f'score2_{round_number}_{i}'] = score2
+    return data
+
+
+@contextmanager
+def scratch_database(path):
+    # Run against a throwaway copy of the schema, never the configured database
+    temporary = path is None
+    if temporary:
+        handle, path = tempfile.mkstemp(suffix='.sqlite3', prefix='bench_tournament_')
+        os.close(handle)
+    if connection.vendor != 'sqlite':
+        raise CommandError('bench_tournament only runs against SQLite.')
+
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = path
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=not temporary)
+        teardown_test_environment()
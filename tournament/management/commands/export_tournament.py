@@ -0,0 +1,40 @@
+from itertools import chain
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.export import EXPORTS, FORMATS, stream_export
+from tournament.models import Tournament
+
+
+class Command(BaseCommand):
+    help = ('Stream standings, pairings or match history of one or more tournaments as CSV or JSON. '
+            'Rows are written as they are read, so memory stays flat however large the export.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_ids', type=int, nargs='+', help='Tournaments to export, in order.')
+        parser.add_argument('--kind', choices=sorted(EXPORTS), default='standings')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--round', type=int, help='Only export this round (pairings only).')
+        parser.add_argument('--output', help='Write to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        ids = options['tournament_ids']
+        tournaments = Tournament.objects.in_bulk(ids)
+        missing = [str(tournament_id) for tournament_id in ids if tournament_id not in tournaments]
+        if missing:
+            raise CommandError(f'No tournament with id {", ".join(missing)}.')
+        if options['round'] is not None and options['kind'] != 'pairings':
+            raise CommandError('--round only applies to --kind pairings.')
+
+        columns, rows = EXPORTS[options['kind']]
+        extra = [options['round']] if options['round'] is not None else []
+        # All tournaments share one header, so a whole season ends up in a single file
+        all_rows = chain.from_iterable(rows(tournaments[tournament_id], *extra) for tournament_id in ids)
+        chunks = stream_export(options['format'], columns, all_rows)
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                f.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
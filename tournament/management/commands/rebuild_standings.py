@@ -0,0 +1,57 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tournament.models import Tournament
+from tournament.rebuild import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = ('Recompute every player counter and tiebreaker from the Pairing rows and correct any that drifted. '
+            'Tournaments are rebuilt in parallel in a process pool.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_ids', type=int, nargs='*', help='Tournaments to rebuild.')
+        parser.add_argument('--all', action='store_true', help='Rebuild every tournament.')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU).')
+        parser.add_argument('--dry-run', action='store_true', help='Report discrepancies without correcting them.')
+
+    def handle(self, *args, **options):
+        if options['all'] and options['tournament_ids']:
+            raise CommandError('Give tournament ids or --all, not both.')
+        if not options['all'] and not options['tournament_ids']:
+            raise CommandError('Give tournament ids or --all.')
+        if options['all']:
+            ids = list(Tournament.objects.order_by('id').values_list('id', flat=True))
+        else:
+            ids = options['tournament_ids']
+            missing = set(ids) - set(Tournament.objects.filter(id__in=ids).values_list('id', flat=True))
+            if missing:
+                raise CommandError(f'No tournament with id {", ".join(map(str, sorted(missing)))}.')
+
+        workers = min(options['workers'] or os.cpu_count() or 1, len(ids))
+        dry_runs = [options['dry_run']] * len(ids)
+        if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            # Forked workers inherit the loaded apps but must open their own database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                                     initializer=connections.close_all) as executor:
+                self.report(ids, executor.map(rebuild_standings, ids, dry_runs), options)
+        else:
+            self.report(ids, map(rebuild_standings, ids, dry_runs), options)
+
+    def report(self, ids, reports, options):
+        total = 0
+        for tournament_id, discrepancies in zip(ids, reports):
+            total += len(discrepancies)
+            players = len({player_id for player_id, *_ in discrepancies})
+            self.stdout.write(f'Tournament {tournament_id}: {len(discrepancies)} discrepancies '
+                              f'across {players} players')
+            if options['verbosity'] > 1:
+                for player_id, name, field, stored, rebuilt in discrepancies:
+                    self.stdout.write(f'  {name} (#{player_id}) {field}: {stored} -> {rebuilt}')
+        action = 'found' if options['dry_run'] else 'corrected'
+        self.stdout.write(self.style.SUCCESS(f'{total} discrepancies {action} in {len(ids)} tournaments.'))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tournament.jobs import claim_next, run
+from tournament.models import Job
+
+
+class Command(BaseCommand):
+    help = ('Run queued tournament jobs (pairing rounds, recomputing standings, exports) one at a time. '
+            'Runs until stopped, or until the queue is empty with --once.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every queued job, then exit.')
+        parser.add_argument('--interval', type=float, default=1, help='Seconds to sleep when the queue is empty.')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            job = claim_next()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            start = time.perf_counter()
+            job = run(job)
+            elapsed = time.perf_counter() - start
+            line = f'Job {job.id} ({job.kind}, tournament {job.tournament_id}) {job.status} in {elapsed:.2f}s'
+            if job.status == Job.FAILED:
+                self.stderr.write(f'{line}\n{job.error}')
+            else:
+                self.stdout.write(f'{line}: {job.message}')
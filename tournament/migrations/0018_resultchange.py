@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0017_player_opponents_game_win_percentage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round', models.IntegerField()),
+                ('previous_player1_score', models.IntegerField(blank=True, null=True)),
+                ('previous_player2_score', models.IntegerField(blank=True, null=True)),
+                ('player1_score', models.IntegerField()),
+                ('player2_score', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('pairing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_changes', to='tournament.pairing')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_changes', to='tournament.tournament')),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0019_tournament_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round', models.IntegerField()),
+                ('position', models.IntegerField()),
+                ('match_points', models.IntegerField()),
+                ('wins', models.IntegerField()),
+                ('losses', models.IntegerField()),
+                ('draws', models.IntegerField()),
+                ('game_win_percentage', models.FloatField()),
+                ('opponents_match_win_percentage', models.FloatField()),
+                ('opponents_game_win_percentage', models.FloatField()),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings_snapshots', to='tournament.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings_snapshots', to='tournament.tournament')),
+            ],
+            options={
+                'ordering': ['tournament', 'round', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('tournament', 'round', 'position'), name='unique_snapshot_position')],
+            },
+        ),
+    ]
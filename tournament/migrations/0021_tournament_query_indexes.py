@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0020_standingssnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pairing',
+            index=models.Index(fields=['tournament', 'round'], name='pairing_round_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pairing',
+            index=models.Index(fields=['tournament', 'player1', 'player2'], name='pairing_players_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['tournament', '-match_points', '-opponents_match_win_percentage', '-game_win_percentage', '-opponents_game_win_percentage'], name='player_standings_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0021_tournament_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bracket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.IntegerField()),
+                ('nodes', models.JSONField()),
+                ('names', models.JSONField()),
+                ('tournament', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='elimination_bracket', to='tournament.tournament')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0022_bracket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='pod',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0024_player_seat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='last_modified',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def mark_byes(apps, schema_editor):
+    Pairing = apps.get_model('tournament', 'Pairing')
+    Pairing.objects.filter(player2__isnull=True, was_bye=False).update(was_bye=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0027_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_byes, migrations.RunPython.noop),
+    ]
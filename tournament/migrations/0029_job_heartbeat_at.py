@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:04
+
+from django.db import migrations, models
+
+
+def start_heartbeats(apps, schema_editor):
+    # Jobs already running count from when they started
+    Job = apps.get_model('tournament', 'Job')
+    Job.objects.filter(heartbeat_at__isnull=True).update(heartbeat_at=models.F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0028_backfill_pairing_was_bye'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class Tournament(models.Model):
     name = models.CharField(max_length=100)
@@ -20,6 +21,8 @@ class Tournament(models.Model):
     pods = models.IntegerField()
     number_of_rounds = models.IntegerField(default=0)
     is_ended = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=0)  # Bumped on every change to results or pairings
+    last_modified = models.DateTimeField(default=timezone.now)  # Touched together with version
 
 
 class Player(models.Model):
@@ -33,76 +36,21 @@ class Player(models.Model):
     games_lost = models.IntegerField(default=0)
     games_drawn = models.IntegerField(default=0)
     had_bye = models.BooleanField(default=False)
+    pod = models.IntegerField(null=True, blank=True)  # Draft pod, players are only paired inside their pod
+    seat = models.IntegerField(null=True, blank=True)  # Seat at the pod's draft table, from 1
     game_win_percentage = models.FloatField(default=0.0)
     opponents_match_win_percentage = models.FloatField(default=0.0)  # Field to store OMP
     opponents_game_win_percentage = models.FloatField(default=0.0)
 
-    def calculate_gwp(self):
-        if self.game_win_percentage != 0.0:
-            return  # Skip recalculation if already calculated
-
-        total_games_played = self.games_won + self.games_lost + self.games_drawn
-        total_possible_points = total_games_played * 3
-
-        if total_games_played == 0:
-            self.game_win_percentage = 33.33  # Set minimum GWP to 33.33% if no games played
-        else:
-            total_game_points_earned = (self.games_won * 3) + (self.games_drawn * 1)
-            gwp = (total_game_points_earned / total_possible_points) * 100
-            self.game_win_percentage = max(gwp, 33.33)
-
-        self.game_win_percentage = float(f"{self.game_win_percentage:.2f}")
-        self.save()
-
-    def calculate_omp(self):
-        if self.opponents_match_win_percentage != 0.0:
-            return  # Skip recalculation if already calculated
-
-        pairings = Pairing.objects.filter(models.Q(player1=self) | models.Q(player2=self)).exclude(was_bye=True)
-        opponent_mw_percentages = []
-        for pairing in pairings:
-            opponent = pairing.player2 if pairing.player1 == self else pairing.player1
-            if opponent and (opponent.wins + opponent.losses + opponent.draws > 0):  # Valid opponent
-                opponent_mwp = (opponent.match_points / ((opponent.wins + opponent.losses + opponent.draws) * 3)) * 100
-                opponent_mw_percentages.append(max(opponent_mwp, 33.33))
-
-        if not opponent_mw_percentages and self.had_bye:
-            self.opponents_match_win_percentage = 0.0
-        else:
-            if opponent_mw_percentages:
-                omp = sum(opponent_mw_percentages) / len(opponent_mw_percentages)
-                self.opponents_match_win_percentage = max(omp, 33.33)
-            else:
-                self.opponents_match_win_percentage = 33.33
-
-        self.opponents_match_win_percentage = float(f"{self.opponents_match_win_percentage:.2f}")
-        self.save()
-
-    def calculate_ogp(self):
-        if self.opponents_game_win_percentage != 0.0:
-            return  # Skip recalculation if already calculated
-
-        pairings = Pairing.objects.filter(models.Q(player1=self) | models.Q(player2=self)).exclude(was_bye=True)
-        opponent_gw_percentages = []
-        for pairing in pairings:
-            opponent = pairing.player2 if pairing.player1 == self else pairing.player1
-            if opponent:
-                games_played = opponent.games_won + opponent.games_lost + opponent.games_drawn
-                if games_played > 0:  # Valid opponent with games played
-                    gwp = (opponent.games_won / games_played) * 100
-                    opponent_gw_percentages.append(max(gwp, 33.33))
-
-        if not opponent_gw_percentages and self.had_bye:
-            self.opponents_game_win_percentage = 0.0
-        else:
-            if opponent_gw_percentages:
-                ogp = sum(opponent_gw_percentages) / len(opponent_gw_percentages)
-                self.opponents_game_win_percentage = max(ogp, 33.33)
-            else:
-                self.opponents_game_win_percentage = 33.33
-
-        self.opponents_game_win_percentage = float(f"{self.opponents_game_win_percentage:.2f}")
-        self.save()
+    class Meta:
+        indexes = [
+            # Leaderboard order within a tournament, so standings never need a sort
+            models.Index(
+                fields=['tournament', '-match_points', '-opponents_match_win_percentage',
+                        '-game_win_percentage', '-opponents_game_win_percentage'],
+                name='player_standings_idx'
+            ),
+        ]
 
 
 class Pairing(models.Model):
@@ -114,4 +62,98 @@ class Pairing(models.Model):
     result = models.CharField(max_length=5, null=True, blank=True)
     round = models.IntegerField()
     results_submitted = models.BooleanField(default=False)
-    was_bye = models.BooleanField(default=False)
\ No newline at end of file
+    was_bye = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tournament', 'round'], name='pairing_round_idx'),
+            models.Index(fields=['tournament', 'player1', 'player2'], name='pairing_players_idx'),
+        ]
+
+class ResultChange(models.Model):
+    # One row per reported or corrected match result, stored as the change from the previous score
+    tournament = models.ForeignKey(Tournament, related_name='result_changes', on_delete=models.CASCADE)
+    pairing = models.ForeignKey(Pairing, related_name='result_changes', on_delete=models.CASCADE)
+    round = models.IntegerField()
+    previous_player1_score = models.IntegerField(null=True, blank=True)
+    previous_player2_score = models.IntegerField(null=True, blank=True)
+    player1_score = models.IntegerField()
+    player2_score = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class ResultSubmission(models.Model):
+    # An accepted result submission, so a retried or doubled request with the same key is applied only once
+    tournament = models.ForeignKey(Tournament, related_name='result_submissions', on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    response = models.JSONField(default=dict)  # What the first request returned, replayed to retries
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'key'], name='unique_result_submission'),
+        ]
+
+
+class Job(models.Model):
+    # A heavy tournament operation run by the run_jobs worker; clients poll it by id
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    tournament = models.ForeignKey(Tournament, related_name='jobs', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=30)
+    arguments = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=10,
+        choices=[(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')],
+        default=QUEUED
+    )
+    progress = models.PositiveSmallIntegerField(default=0)  # Percent
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    output_path = models.CharField(max_length=255, blank=True)  # File to download, for exports
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Last progress report from the worker
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue scan, and the "already queued?" check per tournament
+            models.Index(fields=['status', 'id'], name='job_queue_idx'),
+            models.Index(fields=['tournament', 'kind', 'status'], name='job_tournament_idx'),
+        ]
+
+
+class StandingsSnapshot(models.Model):
+    # The standings as they were when a round closed, one ordered row per player
+    tournament = models.ForeignKey(Tournament, related_name='standings_snapshots', on_delete=models.CASCADE)
+    round = models.IntegerField()
+    position = models.IntegerField()
+    player = models.ForeignKey(Player, related_name='standings_snapshots', on_delete=models.CASCADE)
+    match_points = models.IntegerField()
+    wins = models.IntegerField()
+    losses = models.IntegerField()
+    draws = models.IntegerField()
+    game_win_percentage = models.FloatField()
+    opponents_match_win_percentage = models.FloatField()
+    opponents_game_win_percentage = models.FloatField()
+
+    class Meta:
+        ordering = ['tournament', 'round', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'round', 'position'], name='unique_snapshot_position'),
+        ]
+
+
+class Bracket(models.Model):
+    # A whole single-elimination tree in heap layout: node 1 is the final and the match at node i is
+    # played between the winners of nodes 2i and 2i+1. Leaves (size to 2*size-1) hold the seeded
+    # players, None on a leaf is a bye and None on a match is a result still to come.
+    tournament = models.OneToOneField(Tournament, related_name='elimination_bracket', on_delete=models.CASCADE)
+    size = models.IntegerField()
+    nodes = models.JSONField()
+    names = models.JSONField()  # Player names by id, so rendering needs no player queries
@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import random
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import models, transaction
+
+from .draft import cross_table_pairings, is_draft, is_pod_event, seat_players
+from .events import publish_round
+from .leaderboard import bump_version
+from .locks import lock_tournament
+from .models import Pairing, Player
+from .standings import snapshot_standings
+
+
+def load_history(tournament):
+    # One query for the whole event: who has played whom, and who has already had a bye
+    opponents = defaultdict(set)
+    byes = set()
+    rows = Pairing.objects.filter(tournament=tournament).values_list('player1_id', 'player2_id')
+    for player1_id, player2_id in rows.iterator():
+        if player2_id is None:
+            byes.add(player1_id)
+        else:
+            opponents[player1_id].add(player2_id)
+            opponents[player2_id].add(player1_id)
+    return opponents, byes
+
+
+# Pods smaller than this pair in well under a millisecond, faster than handing them to a worker process
+POOL_MIN_POD_SIZE = 1000
+
+
+def pair_players(players, opponents, byes, rng=random):
+    """Pair one Swiss round in memory.
+
+    ``players`` is a list of ``(player_id, match_points)``, ``opponents`` maps a
+    player id to the ids they already played and ``byes`` holds the ids that
+    already had a bye. Returns ``(player1_id, player2_id)`` tuples, where a
+    ``player2_id`` of ``None`` is the bye. ``rng`` is the source of randomness
+    for shuffling inside score groups.
+    """
+    # Score groups from the top down, shuffled inside each group
+    groups = defaultdict(list)
+    for player_id, match_points in players:
+        groups[match_points].append(player_id)
+    ranked = []
+    for match_points in sorted(groups, reverse=True):
+        group = groups[match_points]
+        rng.shuffle(group)
+        ranked.extend(group)
+
+    bye = None
+    if len(ranked) % 2:
+        # The bye goes to the lowest ranked player that has not had one yet
+        bye = next((player_id for player_id in reversed(ranked) if player_id not in byes), ranked[-1])
+        ranked.remove(bye)
+
+    pairings = []
+    unpaired = ranked
+    while unpaired:
+        player_id = unpaired.pop(0)
+        played = opponents.get(player_id, ())
+        # First fresh opponent in ranking order; running past the score group is the pair-down
+        index = next((i for i, candidate in enumerate(unpaired) if candidate not in played), None)
+        if index is None:
+            freed = _swap_rematch(pairings, player_id, unpaired[0], opponents)
+            if freed is not None:
+                player_id = freed
+            index = 0  # Pair with the next player, a rematch only if no swap was possible
+        pairings.append((player_id, unpaired.pop(index)))
+
+    if bye is not None:
+        pairings.append((bye, None))
+    return pairings
+
+
+def _swap_rematch(pairings, player_id, other_id, opponents):
+    # Try to break a forced rematch by trading partners with an already paired table,
+    # starting from the bottom tables so the top of the standings stays untouched
+    for table in range(len(pairings) - 1, -1, -1):
+        a, b = pairings[table]
+        if a not in opponents.get(player_id, ()) and b not in opponents.get(other_id, ()):
+            pairings[table] = (a, player_id)
+            return b
+        if b not in opponents.get(player_id, ()) and a not in opponents.get(other_id, ()):
+            pairings[table] = (player_id, b)
+            return a
+    return None
+
+
+def pair_pods(players, opponents, byes):
+    """Pair every pod on its own and merge the result into one round.
+
+    ``players`` holds ``(player_id, match_points, pod)``. Events with large
+    pods pair them concurrently in a process pool, so the round takes about
+    as long as its largest pod. Each pod only carries its own players'
+    history, and its own random seed so pods don't shuffle alike.
+    """
+    pods = defaultdict(list)
+    for player_id, match_points, pod in players:
+        pods[pod].append((player_id, match_points))
+
+    tasks = []
+    for pod in sorted(pods, key=lambda pod: (pod is None, pod)):
+        members = pods[pod]
+        history = {player_id: opponents[player_id] for player_id, _ in members if player_id in opponents}
+        pod_byes = {player_id for player_id, _ in members if player_id in byes}
+        tasks.append((members, history, pod_byes, random.getrandbits(64)))
+
+    workers = getattr(settings, 'PAIRING_POOL_WORKERS', None) or os.cpu_count() or 1
+    largest_pod = max(len(members) for members in pods.values()) if pods else 0
+    if len(tasks) > 1 and workers > 1 and largest_pod >= POOL_MIN_POD_SIZE and _fork_context():
+        # Forked workers inherit the loaded apps and never touch the database
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=_fork_context()) as executor:
+            results = list(executor.map(_pair_pod, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        results = [_pair_pod(task) for task in tasks]
+
+    # Byes of all pods go to the bottom tables
+    pairings = [pair for pod_pairings in results for pair in pod_pairings if pair[1] is not None]
+    pairings += [pair for pod_pairings in results for pair in pod_pairings if pair[1] is None]
+    return pairings
+
+
+def _fork_context():
+    try:
+        return multiprocessing.get_context('fork')
+    except ValueError:
+        return None  # No fork on this platform, pods are paired inline
+
+
+def _pair_pod(task):
+    members, history, pod_byes, seed = task
+    return pair_players(members, history, pod_byes, random.Random(seed))
+
+
+def create_first_round(tournament, players):
+    if is_draft(tournament):
+        # Drafts open with everyone seated in a pod, playing the seat across the table
+        pairs = cross_table_pairings(seat_players(tournament, players))
+    else:
+        # Round 1 is a random pairing: everyone is in the same score group and has no history
+        pairs = pair_players([(player.id, 0) for player in players], {}, set())
+    write_round(tournament, 1, pairs)
+
+
+def create_new_round(tournament):
+    # Two requests for the next round must not both pair it
+    with transaction.atomic():
+        lock_tournament(tournament)
+        current_round = (Pairing.objects.filter(tournament=tournament)
+                         .aggregate(models.Max('round'))['round__max'] or 0) + 1
+
+        # Pairing the next round closes the previous one
+        if current_round > 1:
+            snapshot_standings(tournament, current_round - 1)
+
+        if current_round > tournament.number_of_rounds:
+            tournament.is_ended = True
+            tournament.save()
+            bump_version(tournament)
+            return
+
+        players = list(tournament.players.all())
+        opponents, byes = load_history(tournament)
+        byes.update(player.id for player in players if player.had_bye)
+
+        if is_pod_event(tournament):
+            pairs = pair_pods([(player.id, player.match_points, player.pod) for player in players], opponents, byes)
+        else:
+            pairs = pair_players([(player.id, player.match_points) for player in players], opponents, byes)
+        write_round(tournament, current_round, pairs)
+
+
+def write_round(tournament, round_number, pairs):
+    # A whole round is one bulk insert, plus one update for the byes
+    pairings = [
+        Pairing(
+            tournament=tournament,
+            player1_id=player1_id,
+            player2_id=player2_id,
+            result='2-0' if player2_id is None else None,
+            was_bye=player2_id is None,
+            round=round_number
+        )
+        for player1_id, player2_id in pairs
+    ]
+    bye_ids = [player1_id for player1_id, player2_id in pairs if player2_id is None]
+
+    with transaction.atomic():
+        Pairing.objects.bulk_create(pairings, batch_size=500)
+        if bye_ids:
+            Player.objects.filter(id__in=bye_ids).update(had_bye=True)
+        bump_version(tournament)
+        publish_round(tournament, round_number, pairings)
+    return pairings
@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .leaderboard import bump_version
+from .locks import lock_tournament
+from .models import Pairing, Player, Tournament
+from .standings import COUNTER_FIELDS, TIEBREAKER_FIELDS, compute_tiebreakers, submitted_match_points
+
+REBUILT_FIELDS = COUNTER_FIELDS + TIEBREAKER_FIELDS
+
+
+def rebuild_standings(tournament_id, dry_run=False):
+    """Recompute every counter and tiebreaker of a tournament's players from its Pairing rows alone.
+
+    Counters come from two aggregate queries, one per side of the table, so
+    no pairing is loaded into Python. Scored pairings count the same way
+    ``apply_results`` counts them; ``games_drawn`` has no source in a
+    two-number score and is always 0. Results that
+    ``submit_tournament_results`` wrote over or instead of the scores add
+    only the match points it awarded for them. Players whose stored values differ are
+    written back in batches unless ``dry_run``. Returns the discrepancies as
+    ``(player_id, name, field, stored, rebuilt)``; tiebreakers that were
+    never computed are corrected without being reported.
+    """
+    with transaction.atomic():
+        tournament = Tournament.objects.get(id=tournament_id)
+        if not dry_run:
+            lock_tournament(tournament)
+
+        counters = {player_id: dict.fromkeys(COUNTER_FIELDS, 0)
+                    for player_id in Player.objects.filter(tournament=tournament).values_list('id', flat=True)}
+        pairings = Pairing.objects.filter(tournament=tournament)
+        scored = pairings.filter(results_submitted=True, player1_score__isnull=False, player2_score__isnull=False)
+        for side, other in (('player1', 'player2'), ('player2', 'player1')):
+            for player_id, wins, losses, draws, games_won, games_lost in _side_totals(scored, side, other):
+                totals = counters[player_id]
+                totals['wins'] += wins
+                totals['losses'] += losses
+                totals['draws'] += draws
+                totals['games_won'] += games_won or 0
+                totals['games_lost'] += games_lost or 0
+        for totals in counters.values():
+            totals['match_points'] = totals['wins'] * 3 + totals['draws']
+        submitted = (pairings.filter(results_submitted=True).exclude(result=None)
+                     .values_list('player1_id', 'player2_id', 'result', 'player1_score', 'player2_score'))
+        for player1_id, player2_id, *result in submitted.iterator():
+            for player_id, points in zip((player1_id, player2_id), submitted_match_points(*result)):
+                if player_id is not None:
+                    counters[player_id]['match_points'] += points
+        for player_id in pairings.filter(player2__isnull=True).values_list('player1_id', flat=True).distinct():
+            counters[player_id]['had_bye'] = True
+
+        matches = list(pairings.filter(player2__isnull=False, was_bye=False).values_list('player1_id', 'player2_id'))
+        tiebreakers = compute_tiebreakers(
+            {player_id: tuple(totals[field] for field in COUNTER_FIELDS) for player_id, totals in counters.items()},
+            matches
+        )
+
+        discrepancies = []
+        changed = []
+        for player in Player.objects.filter(tournament=tournament).only('name', *REBUILT_FIELDS).iterator():
+            rebuilt = dict(counters[player.id], **dict(zip(TIEBREAKER_FIELDS, tiebreakers[player.id])))
+            differences = [(field, getattr(player, field), rebuilt[field]) for field in REBUILT_FIELDS
+                           if getattr(player, field) != rebuilt[field]]
+            if differences:
+                # Players still at the 0.0 defaults never had tiebreakers computed, which is not drift
+                never_computed = not any(getattr(player, field) for field in TIEBREAKER_FIELDS)
+                discrepancies.extend((player.id, player.name, field, stored, value)
+                                     for field, stored, value in differences
+                                     if not (never_computed and field in TIEBREAKER_FIELDS))
+                for field, _, value in differences:
+                    setattr(player, field, value)
+                changed.append(player)
+
+        if changed and not dry_run:
+            Player.objects.bulk_update(changed, REBUILT_FIELDS, batch_size=500)
+            bump_version(tournament)
+    return discrepancies
+
+
+def _side_totals(scored, side, other):
+    # Per player on one side of the table: wins, losses, draws and games, summed in the database
+    own, opponent = f'{side}_score', f'{other}_score'
+    return (scored.filter(**{f'{side}__isnull': False}).order_by().values(side)
+            .annotate(wins=Count('id', filter=Q(**{f'{own}__gt': F(opponent)})),
+                      losses=Count('id', filter=Q(**{f'{own}__lt': F(opponent)})),
+                      draws=Count('id', filter=Q(**{own: F(opponent)})),
+                      games_won=Sum(own),
+                      games_lost=Sum(opponent))
+            .values_list(side, 'wins', 'losses', 'draws', 'games_won', 'games_lost')
+            .iterator())
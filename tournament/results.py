@@ -0,0 +1,176 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .events import publish_results
+from .leaderboard import bump_version
+from .locks import lock_tournament
+from .models import Pairing, Player, ResultChange, ResultSubmission
+from .standings import update_standings
+
+RESULT_FIELDS = ['match_points', 'wins', 'losses', 'draws', 'games_won', 'games_lost']
+
+PAIRING_RESULT_FIELDS = ['player1_score', 'player2_score', 'result', 'results_submitted']
+
+IDEMPOTENCY_KEY_LENGTH = 64
+
+
+def match_counters(score1, score2):
+    # What a reported score contributes to each side's counters
+    if score1 is None or score2 is None:
+        return {}, {}
+    if score1 > score2:
+        player1, player2 = {'match_points': 3, 'wins': 1}, {'losses': 1}
+    elif score2 > score1:
+        player1, player2 = {'losses': 1}, {'match_points': 3, 'wins': 1}
+    else:
+        player1, player2 = {'match_points': 1, 'draws': 1}, {'match_points': 1, 'draws': 1}
+    player1.update(games_won=score1, games_lost=score2)
+    player2.update(games_won=score2, games_lost=score1)
+    return player1, player2
+
+
+def validate_score(best_of, score1, score2):
+    """Check a reported score can happen in a best-of-``best_of`` match; raises ValueError if not.
+
+    Neither side can win more games than it takes to take the match, both
+    can't reach that number, and no more games can be played than
+    ``best_of``. Draws such as 1-1 or 0-0 are allowed.
+    """
+    for score in (score1, score2):
+        if not isinstance(score, int) or isinstance(score, bool) or score < 0:
+            raise ValueError('Scores must be whole numbers of games, 0 or more.')
+    games_to_win = best_of // 2 + 1
+    if max(score1, score2) > games_to_win or min(score1, score2) == games_to_win or score1 + score2 > best_of:
+        raise ValueError(f'{score1}-{score2} is not a possible best of {best_of} result.')
+
+
+def parse_results(payload, best_of):
+    """Read one result, or a ``results`` list of them, from a decoded JSON payload.
+
+    Each result is ``{"pairing": id, "player1_score": n, "player2_score": n}``.
+    Returns ``{pairing_id: (player1_score, player2_score)}`` ready for
+    ``apply_results``, or raises ValueError describing the first bad entry.
+    """
+    entries = payload.get('results', [payload]) if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('Expected a result object or a non-empty "results" list.')
+
+    results = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError('Each result must be an object.')
+        pairing_id = entry.get('pairing')
+        if not isinstance(pairing_id, int) or isinstance(pairing_id, bool):
+            raise ValueError('Each result needs an integer "pairing" id.')
+        if pairing_id in results:
+            raise ValueError(f'Pairing {pairing_id} is reported more than once.')
+        score1, score2 = entry.get('player1_score'), entry.get('player2_score')
+        try:
+            validate_score(best_of, score1, score2)
+        except ValueError as e:
+            raise ValueError(f'Pairing {pairing_id}: {e}')
+        results[pairing_id] = (score1, score2)
+    return results
+
+
+def result_delta(pairing, score1, score2):
+    # Counter changes per player id when the pairing's current result is replaced by score1-score2
+    if pairing.results_submitted:
+        before = match_counters(pairing.player1_score, pairing.player2_score)
+    else:
+        before = ({}, {})
+    after = match_counters(score1, score2)
+
+    deltas = {}
+    for player_id, old, new in ((pairing.player1_id, before[0], after[0]), (pairing.player2_id, before[1], after[1])):
+        if player_id is None:
+            continue  # The bye has no counters
+        delta = {field: new.get(field, 0) - old.get(field, 0) for field in RESULT_FIELDS}
+        delta = {field: value for field, value in delta.items() if value}
+        if delta:
+            deltas[player_id] = delta
+    return deltas
+
+
+def apply_results(tournament, results):
+    """Apply reported scores for any number of pairings in one transaction.
+
+    ``results`` maps pairing ids to ``(player1_score, player2_score)``. The
+    pairings and their players are loaded in bulk, every change is applied
+    in memory as a delta against the pairing's previous result, and the new
+    state is written back with ``bulk_update``. Unchanged results are
+    skipped. Returns the ids of the players whose counters changed.
+    """
+    with transaction.atomic():
+        lock_tournament(tournament)
+        pairings = list(Pairing.objects.filter(tournament=tournament, id__in=list(results)))
+
+        changed_pairings = []
+        changes = []
+        deltas = defaultdict(Counter)
+        for pairing in pairings:
+            score1, score2 = results[pairing.id]
+            if pairing.results_submitted and (pairing.player1_score, pairing.player2_score) == (score1, score2):
+                continue
+
+            for player_id, delta in result_delta(pairing, score1, score2).items():
+                deltas[player_id].update(delta)
+            changes.append(ResultChange(
+                tournament_id=pairing.tournament_id,
+                pairing=pairing,
+                round=pairing.round,
+                previous_player1_score=pairing.player1_score if pairing.results_submitted else None,
+                previous_player2_score=pairing.player2_score if pairing.results_submitted else None,
+                player1_score=score1,
+                player2_score=score2
+            ))
+
+            pairing.player1_score = score1
+            pairing.player2_score = score2
+            pairing.result = f'{score1}-{score2}'
+            pairing.results_submitted = True
+            changed_pairings.append(pairing)
+
+        players = list(Player.objects.filter(id__in=list(deltas)))
+        for player in players:
+            for field, value in deltas[player.id].items():
+                setattr(player, field, getattr(player, field) + value)
+
+        Pairing.objects.bulk_update(changed_pairings, PAIRING_RESULT_FIELDS, batch_size=500)
+        Player.objects.bulk_update(players, RESULT_FIELDS, batch_size=500)
+        ResultChange.objects.bulk_create(changes, batch_size=500)
+
+        # Tiebreakers of the changed players and their opponents only
+        standings = update_standings(tournament, set(deltas))
+
+        if changed_pairings:
+            bump_version(tournament)
+            publish_results(tournament, changed_pairings, standings)
+
+    return set(deltas)
+
+
+def submit_results(tournament, results, key=None):
+    """``apply_results`` at most once per idempotency ``key``.
+
+    A submission whose key was already accepted for this tournament changes
+    nothing and gets the first submission's response back. Returns
+    ``(response, replayed)``. Without a key every call is applied.
+    """
+    with transaction.atomic():
+        lock_tournament(tournament)
+        if key:
+            previous = ResultSubmission.objects.filter(tournament=tournament, key=key).first()
+            if previous is not None:
+                return previous.response, True
+
+        changed_players = apply_results(tournament, results)
+        response = {
+            'pairings': sorted(results),
+            'changed_players': sorted(changed_players),
+            'version': tournament.version,
+        }
+        if key:
+            ResultSubmission.objects.create(tournament=tournament, key=key, response=response)
+    return response, False
@@ -0,0 +1,149 @@
+from django.db import models, transaction
+
+from .models import Pairing, Player, StandingsSnapshot
+
+MINIMUM_PERCENTAGE = 33.33
+
+TIEBREAKER_FIELDS = ['game_win_percentage', 'opponents_match_win_percentage', 'opponents_game_win_percentage']
+
+# Leaderboard order: match points, then OMW%, GWP and OGW%
+STANDINGS_ORDER = ['-match_points', '-opponents_match_win_percentage', '-game_win_percentage',
+                   '-opponents_game_win_percentage', 'id']
+
+SNAPSHOT_FIELDS = ['match_points', 'wins', 'losses', 'draws', 'game_win_percentage',
+                   'opponents_match_win_percentage', 'opponents_game_win_percentage']
+
+COUNTER_FIELDS = ['match_points', 'wins', 'losses', 'draws', 'games_won', 'games_lost', 'games_drawn', 'had_bye']
+
+# Match points for the per-player scores posted to submit_tournament_results
+SUBMITTED_MATCH_POINTS = {1: 3, 2: 6}
+
+
+def submitted_match_points(result, player1_score, player2_score):
+    """Match points ``submit_tournament_results`` awarded for a submitted result, as ``(player1, player2)``.
+
+    That view writes ``result`` without touching the scores, so only a
+    result that does not read as the pairing's scores is one it wrote.
+    """
+    if result is None or (player1_score is not None and result == f'{player1_score}-{player2_score}'):
+        return 0, 0
+    score1, _, score2 = result.partition('-')
+    return tuple(SUBMITTED_MATCH_POINTS.get(int(score), 0) if score.isdigit() else 0 for score in (score1, score2))
+
+
+def compute_tiebreakers(counters, matches):
+    """Compute GWP, OMW% and OGW% for every player in one pass.
+
+    ``counters`` maps a player id to a tuple in ``COUNTER_FIELDS`` order and
+    ``matches`` is a list of ``(player1_id, player2_id)`` for every non-bye
+    pairing. Returns ``{player_id: (gwp, omw, ogw)}``.
+    """
+    ids = list(counters)
+    index = {player_id: i for i, player_id in enumerate(ids)}
+
+    # Per-player arrays: own GWP, and the floored match/game win rates opponents see
+    gwp = [0.0] * len(ids)
+    match_rate = [None] * len(ids)
+    game_rate = [None] * len(ids)
+    for i, player_id in enumerate(ids):
+        match_points, wins, losses, draws, games_won, games_lost, games_drawn, had_bye = counters[player_id]
+        games_played = games_won + games_lost + games_drawn
+        if games_played:
+            gwp[i] = max((games_won * 3 + games_drawn) / (games_played * 3) * 100, MINIMUM_PERCENTAGE)
+            game_rate[i] = max(games_won / games_played * 100, MINIMUM_PERCENTAGE)
+        else:
+            gwp[i] = MINIMUM_PERCENTAGE
+        matches_played = wins + losses + draws
+        if matches_played:
+            match_rate[i] = min(max(match_points / (matches_played * 3) * 100, MINIMUM_PERCENTAGE), 100.0)
+
+    # Accumulate opponent rates along both directions of every pairing
+    match_sum = [0.0] * len(ids)
+    match_count = [0] * len(ids)
+    game_sum = [0.0] * len(ids)
+    game_count = [0] * len(ids)
+    for player1_id, player2_id in matches:
+        a = index.get(player1_id)
+        b = index.get(player2_id)
+        if a is None or b is None:
+            continue
+        for player, opponent in ((a, b), (b, a)):
+            if match_rate[opponent] is not None:
+                match_sum[player] += match_rate[opponent]
+                match_count[player] += 1
+            if game_rate[opponent] is not None:
+                game_sum[player] += game_rate[opponent]
+                game_count[player] += 1
+
+    results = {}
+    for i, player_id in enumerate(ids):
+        had_bye = counters[player_id][-1]
+        results[player_id] = (
+            round(gwp[i], 2),
+            _opponent_average(match_sum[i], match_count[i], had_bye),
+            _opponent_average(game_sum[i], game_count[i], had_bye),
+        )
+    return results
+
+
+def _opponent_average(total, count, had_bye):
+    if count:
+        return round(max(total / count, MINIMUM_PERCENTAGE), 2)
+    # A player whose only "opponent" so far was the bye has no opponent percentage yet
+    return 0.0 if had_bye else MINIMUM_PERCENTAGE
+
+
+def update_standings(tournament, player_ids=None):
+    """Recalculate and store tiebreakers.
+
+    Without ``player_ids`` the whole event is recalculated. With them, only
+    those players and everyone who played them are refreshed: a player's
+    GWP depends on their own counters, while OMW% and OGW% depend on their
+    opponents' counters.
+    """
+    pairings = Pairing.objects.filter(tournament=tournament, player2__isnull=False, was_bye=False)
+
+    if player_ids is None:
+        affected = None
+        players = list(Player.objects.filter(tournament=tournament))
+        matches = list(pairings.values_list('player1_id', 'player2_id'))
+    else:
+        affected = set(player_ids)
+        if not affected:
+            return []
+        affected_filter = models.Q(player1__in=affected) | models.Q(player2__in=affected)
+        for player1_id, player2_id in pairings.filter(affected_filter).values_list('player1_id', 'player2_id'):
+            affected.update((player1_id, player2_id))
+
+        # Every match of an affected player, and the counters of everyone in those matches
+        affected_filter = models.Q(player1__in=affected) | models.Q(player2__in=affected)
+        matches = list(pairings.filter(affected_filter).values_list('player1_id', 'player2_id'))
+        needed = set(affected)
+        for match in matches:
+            needed.update(match)
+        players = list(Player.objects.filter(tournament=tournament, id__in=needed))
+
+    counters = {player.id: tuple(getattr(player, field) for field in COUNTER_FIELDS) for player in players}
+    tiebreakers = compute_tiebreakers(counters, matches)
+
+    if affected is not None:
+        players = [player for player in players if player.id in affected]
+    for player in players:
+        player.game_win_percentage, player.opponents_match_win_percentage, player.opponents_game_win_percentage = \
+            tiebreakers[player.id]
+    Player.objects.bulk_update(players, TIEBREAKER_FIELDS, batch_size=500)
+    return players
+
+
+def snapshot_standings(tournament, round_number):
+    # Freeze the current standings as "after round N"; taking it again for the same round replaces it
+    rows = tournament.players.order_by(*STANDINGS_ORDER).values_list('id', *SNAPSHOT_FIELDS)
+    snapshots = [
+        StandingsSnapshot(tournament=tournament, round=round_number, position=position, player_id=row[0],
+                          **dict(zip(SNAPSHOT_FIELDS, row[1:])))
+        for position, row in enumerate(rows.iterator(), start=1)
+    ]
+    with transaction.atomic():
+        StandingsSnapshot.objects.filter(tournament=tournament, round=round_number).delete()
+        StandingsSnapshot.objects.bulk_create(snapshots, batch_size=500)
+    return snapshots
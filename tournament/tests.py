@@ -1,3 +1,539 @@
-from django.test import TestCase
+import random
+from collections import Counter
+from datetime import timedelta
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .bracket import build_nodes, create_bracket, create_top_cut, record_winner, seed_order
+from .draft import assign_pods
+from .events import get_broker
+from .jobs import PAIR_ROUND, claim_next, enqueue, report
+from .leaderboard import build_leaderboard, round_pairings
+from .models import Bracket, Job, Pairing, Player, ResultChange, StandingsSnapshot, Tournament
+from .pairing import _swap_rematch, create_new_round, load_history, pair_players, write_round
+from .rebuild import rebuild_standings
+from .results import apply_results, parse_results, submit_results, validate_score
+from .standings import STANDINGS_ORDER, compute_tiebreakers, snapshot_standings, update_standings
+
+
+class QueryPlanTests(TestCase):
+    """Every hot query must be answered from an index, never a full table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tournament = Tournament.objects.create(name='Plan', pods=1, number_of_rounds=3)
+        other = Tournament.objects.create(name='Other', pods=1, number_of_rounds=3)
+        for tournament in (cls.tournament, other):
+            players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=tournament) for i in range(9)])
+            Pairing.objects.bulk_create(
+                [Pairing(tournament=tournament, player1=players[i], player2=players[i + 1], round=1)
+                 for i in range(0, 8, 2)]
+                + [Pairing(tournament=tournament, player1=players[8], result='2-0', round=1)]
+            )
+        cls.player = cls.tournament.players.first()
+        cls.opponent = cls.tournament.players.last()
+
+    def query_plan(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScan(self, sql, params=()):
+        plan = self.query_plan(sql, params)
+        scans = [step for step in plan if step.startswith('SCAN ')]
+        self.assertFalse(scans, f'Full scan in query plan {plan} for: {sql}')
+
+    def assertQuerySetUsesIndex(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        self.assertNoFullScan(sql, params)
+
+    def assertCodePathUsesIndexes(self, function, *args):
+        with CaptureQueriesContext(connection) as queries:
+            function(*args)
+        statements = [query['sql'] for query in queries.captured_queries
+                      if query['sql'].startswith(('SELECT', 'UPDATE', 'DELETE'))]
+        self.assertTrue(statements)
+        for sql in statements:
+            self.assertNoFullScan(sql)
+
+    def test_pairings_by_round(self):
+        self.assertQuerySetUsesIndex(Pairing.objects.filter(tournament=self.tournament, round=1).order_by('id'))
+        self.assertQuerySetUsesIndex(
+            Pairing.objects.filter(tournament=self.tournament, round__in=[1, 2]).order_by('round', 'id')
+        )
+
+    def test_pairings_of_player(self):
+        self.assertQuerySetUsesIndex(Pairing.objects.filter(Q(player1=self.player) | Q(player2=self.player)))
+        self.assertQuerySetUsesIndex(Pairing.objects.filter(
+            Q(player1__in=[self.player.id, self.opponent.id]) | Q(player2__in=[self.player.id, self.opponent.id]),
+            tournament=self.tournament
+        ))
+
+    def test_pairing_between_players(self):
+        self.assertQuerySetUsesIndex(
+            Pairing.objects.filter(tournament=self.tournament, player1=self.player, player2=self.opponent)
+        )
+
+    def test_standings_order(self):
+        queryset = Player.objects.filter(tournament=self.tournament).order_by(*STANDINGS_ORDER)
+        self.assertQuerySetUsesIndex(queryset)
+        sql, params = queryset.query.sql_with_params()
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', self.query_plan(sql, params))
+
+    def test_snapshot_read(self):
+        self.assertQuerySetUsesIndex(
+            StandingsSnapshot.objects.filter(tournament=self.tournament, round=1).order_by('position')
+        )
+
+    def test_pairing_engine(self):
+        self.assertCodePathUsesIndexes(load_history, self.tournament)
+        self.assertCodePathUsesIndexes(create_new_round, self.tournament)
+
+    def test_result_submission(self):
+        pairing = Pairing.objects.filter(tournament=self.tournament, player2__isnull=False).first()
+        self.assertCodePathUsesIndexes(apply_results, self.tournament, {pairing.id: (2, 1)})
+
+    def test_standings_engine(self):
+        self.assertCodePathUsesIndexes(update_standings, self.tournament)
+        self.assertCodePathUsesIndexes(update_standings, self.tournament, {self.player.id})
+        self.assertCodePathUsesIndexes(snapshot_standings, self.tournament, 1)
+
+    def test_leaderboard(self):
+        self.assertCodePathUsesIndexes(build_leaderboard, self.tournament)
+        self.assertCodePathUsesIndexes(round_pairings, self.tournament, 1)
+
+    def test_update_results_view(self):
+        url = reverse('update_results', args=[self.tournament.id])
+        self.assertCodePathUsesIndexes(self.client.post, url, {
+            'player1_id_1_1': self.tournament.players.order_by('id').first().id,
+            'score1_1_1': '2',
+            'score2_1_1': '0',
+        })
+
+
+class PairPlayersTests(SimpleTestCase):
+    def assertEveryoneOnce(self, players, pairings):
+        seated = [player_id for pair in pairings for player_id in pair if player_id is not None]
+        self.assertCountEqual(seated, [player_id for player_id, _ in players])
+
+    def test_everyone_is_paired_once(self):
+        rng = random.Random(1)
+        for size in (2, 7, 8, 21):
+            players = [(player_id, rng.choice([0, 3, 6])) for player_id in range(1, size + 1)]
+            opponents = {1: {2, 3}, 2: {1}, 3: {1}}
+            self.assertEveryoneOnce(players, pair_players(players, opponents, set(), random.Random(size)))
+
+    def test_bye_goes_to_lowest_player_without_one(self):
+        players = [(1, 12), (2, 9), (3, 6), (4, 3), (5, 0)]
+        pairings = pair_players(players, {}, {5})
+        self.assertEqual(pairings[-1], (4, None))
+        self.assertEveryoneOnce(players, pairings)
+
+    def test_odd_score_group_pairs_down(self):
+        pairings = pair_players([(1, 6), (2, 3), (3, 3), (4, 0)], {}, set(), random.Random(0))
+        self.assertIn(pairings[0], [(1, 2), (1, 3)])
+        self.assertEqual(len(pairings), 2)
+
+    def test_rematch_is_avoided_by_a_swap(self):
+        # Greedy pairing gives 1-2 and then leaves 3 and 4, who already played
+        pairings = pair_players([(1, 9), (2, 6), (3, 3), (4, 0)], {3: {4}, 4: {3}}, set())
+        self.assertCountEqual(pairings, [(1, 3), (2, 4)])
+
+    def test_unavoidable_rematch_is_paired(self):
+        self.assertEqual(pair_players([(1, 3), (2, 0)], {1: {2}, 2: {1}}, set()), [(1, 2)])
+
+    def test_swap_rematch(self):
+        pairings = [(1, 2)]
+        self.assertEqual(_swap_rematch(pairings, 3, 4, {3: {4}, 4: {3}}), 2)
+        self.assertEqual(pairings, [(1, 3)])
+
+        pairings = [(1, 2)]
+        everyone = {3: {1, 2, 4}, 4: {1, 2, 3}}
+        self.assertIsNone(_swap_rematch(pairings, 3, 4, everyone))
+        self.assertEqual(pairings, [(1, 2)])
+
+
+class ComputeTiebreakersTests(SimpleTestCase):
+    def test_tiebreakers(self):
+        # Counters in COUNTER_FIELDS order: A beat B 2-0, C and D drew 1-1 with a drawn game, E only had the bye
+        counters = {
+            'A': (3, 1, 0, 0, 2, 0, 0, False),
+            'B': (0, 0, 1, 0, 0, 2, 0, False),
+            'C': (1, 0, 0, 1, 1, 1, 1, False),
+            'D': (1, 0, 0, 1, 1, 1, 1, False),
+            'E': (3, 1, 0, 0, 2, 0, 0, True),
+            'F': (0, 0, 0, 0, 0, 0, 0, False),
+        }
+        tiebreakers = compute_tiebreakers(counters, [('A', 'B'), ('C', 'D')])
+        self.assertEqual(tiebreakers['A'], (100.0, 33.33, 33.33))
+        self.assertEqual(tiebreakers['B'], (33.33, 100.0, 100.0))
+        self.assertEqual(tiebreakers['C'], (44.44, 33.33, 33.33))
+        self.assertEqual(tiebreakers['E'], (100.0, 0.0, 0.0))
+        self.assertEqual(tiebreakers['F'], (33.33, 33.33, 33.33))
+
+    def test_opponents_are_averaged(self):
+        counters = {
+            'A': (6, 2, 0, 0, 4, 1, 0, False),
+            'B': (3, 1, 1, 0, 2, 2, 0, False),
+            'C': (0, 0, 1, 0, 1, 2, 0, False),
+        }
+        tiebreakers = compute_tiebreakers(counters, [('A', 'B'), ('A', 'C')])
+        # B won half its matches and games; C's 0% match rate is floored at 33.33, its games are 1 of 3
+        self.assertEqual(tiebreakers['A'][1:], (round((50 + 33.33) / 2, 2), round((50 + 100 / 3) / 2, 2)))
+
+    def test_opponent_match_rate_is_capped(self):
+        # Match points awarded outside wins and draws can exceed three per match
+        counters = {
+            'A': (9, 1, 0, 0, 2, 0, 0, False),
+            'B': (3, 0, 1, 0, 0, 2, 0, False),
+        }
+        self.assertEqual(compute_tiebreakers(counters, [('A', 'B')])['B'][1], 100.0)
+
+
+class ResultParsingTests(SimpleTestCase):
+    def test_validate_score(self):
+        for best_of, score1, score2 in ((1, 1, 0), (1, 0, 0), (3, 2, 1), (3, 1, 1), (3, 0, 2), (5, 3, 2)):
+            validate_score(best_of, score1, score2)
+        for best_of, score1, score2 in ((1, 2, 0), (1, 1, 1), (3, 2, 2), (3, 3, 0), (5, 4, 0), (3, -1, 2),
+                                        (3, '2', 0), (3, True, 0), (3, None, 0)):
+            with self.assertRaises(ValueError, msg=f'{score1}-{score2} in best of {best_of}'):
+                validate_score(best_of, score1, score2)
+
+    def test_parse_one_result_or_a_list(self):
+        self.assertEqual(parse_results({'pairing': 7, 'player1_score': 2, 'player2_score': 1}, 3), {7: (2, 1)})
+        self.assertEqual(parse_results({'results': [
+            {'pairing': 7, 'player1_score': 2, 'player2_score': 1},
+            {'pairing': 8, 'player1_score': 0, 'player2_score': 2},
+        ]}, 3), {7: (2, 1), 8: (0, 2)})
+
+    def test_parse_rejects_bad_payloads(self):
+        for payload in ([], {'results': []}, {'results': [1]}, {'pairing': '7', 'player1_score': 2, 'player2_score': 0},
+                        {'pairing': 7, 'player1_score': 2}, {'pairing': 7, 'player1_score': 3, 'player2_score': 0},
+                        {'results': [{'pairing': 7, 'player1_score': 2, 'player2_score': 0}] * 2}):
+            with self.assertRaises(ValueError, msg=payload):
+                parse_results(payload, 3)
+
+
+class AssignPodsTests(SimpleTestCase):
+    def pod_sizes(self, players, pods):
+        seats = [SimpleNamespace(pod=None) for _ in range(players)]
+        assign_pods(SimpleNamespace(pods=pods), seats)
+        return sorted(Counter(seat.pod for seat in seats).values())
+
+    def test_even_field_gets_even_pods(self):
+        self.assertEqual(self.pod_sizes(22, 3), [6, 8, 8])
+        self.assertEqual(self.pod_sizes(24, 3), [8, 8, 8])
+
+    def test_odd_field_gets_one_odd_pod(self):
+        self.assertEqual(self.pod_sizes(23, 3), [7, 8, 8])
+        self.assertEqual(self.pod_sizes(17, 4), [4, 4, 4, 5])
+
+
+class BulkRegistrationTests(TestCase):
+    def test_event_registered_in_bulk_can_start_once(self):
+        self.client.post(reverse('create_tournament'), {
+            'name': 'Bulk', 'tournament_type': 'Constructed', 'pairing_method': 'Swiss', 'best_of': 3,
+            'set': 'Set', 'pods': 1,
+        })
+        tournament = Tournament.objects.get()
+        self.client.post(reverse('bulk_add_players', args=[tournament.id]),
+                         {'names': '\n'.join(f'Player {i}' for i in range(20))})
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.number_of_rounds, 5)
+        self.assertFalse(Pairing.objects.filter(tournament=tournament).exists())
+
+        start = reverse('add_players', args=[tournament.id])
+        self.client.post(start, {'start_tournament': ''})
+        self.assertEqual(Pairing.objects.filter(tournament=tournament, round=1).count(), 10)
+        self.client.post(start, {'start_tournament': ''})
+        self.assertEqual(Pairing.objects.filter(tournament=tournament).count(), 10)
+
+    def test_bye_rows_are_marked(self):
+        tournament = Tournament.objects.create(name='Odd', pods=1, number_of_rounds=2)
+        players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=tournament) for i in range(3)])
+        write_round(tournament, 1, [(players[0].id, players[1].id), (players[2].id, None)])
+        self.assertEqual(list(Pairing.objects.order_by('id').values_list('player2_id', 'was_bye')),
+                         [(players[1].id, False), (None, True)])
+
+
+class BracketTests(TestCase):
+    def test_seed_order(self):
+        self.assertEqual(seed_order(2), [1, 2])
+        self.assertEqual(seed_order(8), [1, 8, 4, 5, 2, 7, 3, 6])
+        order = seed_order(16)
+        self.assertTrue(all(order[i] + order[i + 1] == 17 for i in range(0, 16, 2)))
+
+    def test_byes_go_to_top_seeds(self):
+        # Six players in a bracket of eight: seeds 1 and 2 have byes and are already in round 2
+        size, nodes = build_nodes([11, 12, 13, 14, 15, 16])
+        self.assertEqual(size, 8)
+        self.assertEqual(nodes[8:], [11, None, 14, 15, 12, None, 13, 16])
+        self.assertEqual(nodes[4:8], [11, None, 12, None])
+
+        size, nodes = build_nodes([11, 12, 13])
+        self.assertEqual(nodes[4:], [11, None, 12, 13])
+        self.assertEqual(nodes[2:4], [11, None])
+
+    def test_correction_clears_the_path_above(self):
+        tournament = Tournament.objects.create(name='Bracket', pods=1)
+        players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=tournament) for i in range(4)])
+        bracket = create_bracket(tournament, players)
+        first, fourth = players[0].id, players[3].id
+        record_winner(bracket, 2, first)
+        record_winner(bracket, 3, players[1].id)
+        record_winner(bracket, 1, first)
+
+        record_winner(bracket, 2, fourth)
+        bracket.refresh_from_db()
+        self.assertEqual(bracket.nodes[2], fourth)
+        self.assertIsNone(bracket.nodes[1])
+        self.assertEqual(bracket.nodes[3], players[1].id)
+
+        with self.assertRaises(ValueError):
+            record_winner(bracket, 1, players[2].id)
+
+    def test_final_ends_an_elimination_event(self):
+        tournament = Tournament.objects.create(name='Bracket', pods=1, pairing_method='Single Eliminations')
+        players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=tournament) for i in range(2)])
+        create_bracket(tournament, players)
+        self.assertContains(self.client.get(reverse('tournament_list')), 'In progress')
+        self.client.post(reverse('record_bracket_result', args=[tournament.id]), {'node': 1, 'winner': players[0].id})
+        tournament.refresh_from_db()
+        self.assertTrue(tournament.is_ended)
+
+
+class TopCutTests(TestCase):
+    def test_cut_again_needs_a_reset(self):
+        tournament = Tournament.objects.create(name='Cut', pods=1, number_of_rounds=1, is_ended=True)
+        players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=tournament) for i in range(8)])
+        Pairing.objects.bulk_create([Pairing(tournament=tournament, player1=players[i], player2=players[i + 1], round=1)
+                                     for i in range(0, 8, 2)])
+        url = reverse('top_cut', args=[tournament.id])
+        self.client.post(url, {'size': 4})
+        bracket = Bracket.objects.get(tournament=tournament)
+        record_winner(bracket, 2, bracket.nodes[4])
+
+        self.client.post(url, {'size': 8})
+        self.assertEqual(Bracket.objects.get(tournament=tournament).nodes, bracket.nodes)
+
+        self.client.post(url, {'size': 8, 'reset': 'on'})
+        self.assertEqual(Bracket.objects.get(tournament=tournament).size, 8)
+
+    def test_cut_seeds_results_corrected_after_the_end(self):
+        tournament = Tournament.objects.create(name='Cut', pods=1, number_of_rounds=1, is_ended=True)
+        players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=tournament) for i in range(4)])
+        first, second = Pairing.objects.bulk_create([
+            Pairing(tournament=tournament, player1=players[0], player2=players[1], round=1),
+            Pairing(tournament=tournament, player1=players[2], player2=players[3], round=1),
+        ])
+        apply_results(tournament, {first.id: (2, 0), second.id: (2, 1)})
+        snapshot_standings(tournament, 1)
+        apply_results(tournament, {first.id: (0, 2)})
+
+        bracket = create_top_cut(tournament, 4)
+        live = list(tournament.players.order_by(*STANDINGS_ORDER).values_list('id', flat=True))
+        self.assertEqual(bracket.nodes, build_nodes(live)[1])
+
+
+@override_settings(TOURNAMENT_EVENTS={'POLL_SECONDS': 0.2, 'WATCH_SECONDS': 0.05})
+class TournamentEventsTests(TestCase):
+    def test_wsgi_requests_are_long_polls(self):
+        tournament = Tournament.objects.create(name='Events', pods=1)
+        url = reverse('tournament_events', args=[tournament.id])
+        self.assertEqual(self.client.get(url).content, b'retry: 1000\n\n')
+
+        event = get_broker().publish(tournament.id, 'round', {'round': 2})
+        response = self.client.get(url, HTTP_LAST_EVENT_ID=str(event.id - 1))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertTrue(response.content.decode().endswith(event.encode()))
+
+    def test_change_from_another_process_is_noticed(self):
+        # A round paired by the worker publishes into the worker's own broker; only the version tells
+        tournament = Tournament.objects.create(name='Events', pods=1, version=3)
+        url = reverse('tournament_events', args=[tournament.id])
+        self.assertEqual(self.client.get(url, {'version': 3}).content, b'retry: 1000\n\n')
+        self.assertEqual(self.client.get(url, {'version': 2}).content,
+                         b'retry: 1000\n\nevent: changed\ndata: {"version": 3}\n\n')
+
+
+class RoundFragmentCacheTests(TestCase):
+    def test_cached_rows_follow_the_version(self):
+        tournament = Tournament.objects.create(name='Cache', pods=1, number_of_rounds=3, best_of=3)
+        players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=tournament) for i in range(2)])
+        pairing = Pairing.objects.create(tournament=tournament, player1=players[0], player2=players[1], round=1)
+        url = reverse('round_fragment', args=[tournament.id, 1])
+        self.assertContains(self.client.get(url), 'name="score1_1_1" value=""')
+
+        # No cache entry is deleted: on_commit callbacks never run inside a TestCase, as in another process
+        apply_results(tournament, {pairing.id: (2, 1)})
+        self.assertContains(self.client.get(url), 'name="score1_1_1" value="2"')
+
+    def test_closed_rounds_stay_cached_across_other_rounds_results(self):
+        tournament = Tournament.objects.create(name='Cache', pods=1, number_of_rounds=3, best_of=3)
+        players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=tournament) for i in range(2)])
+        first = Pairing.objects.create(tournament=tournament, player1=players[0], player2=players[1], round=1)
+        apply_results(tournament, {first.id: (2, 1)})
+        second = Pairing.objects.create(tournament=tournament, player1=players[1], player2=players[0], round=2)
+        url = reverse('round_fragment', args=[tournament.id, 1])
+        self.client.get(url)
+
+        # A write that logs no change shows whether round 1 is still served from the cache
+        Player.objects.filter(id=players[0].id).update(name='Renamed')
+        apply_results(tournament, {second.id: (2, 0)})
+        self.assertContains(self.client.get(url), 'value="Player 0"')
+
+        apply_results(tournament, {first.id: (1, 2)})
+        self.assertContains(self.client.get(url), 'value="Renamed"')
+
+
+class ResultFormTests(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(name='Form', pods=1, number_of_rounds=3, best_of=3)
+        players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=self.tournament) for i in range(4)])
+        self.pairings = Pairing.objects.bulk_create([
+            Pairing(tournament=self.tournament, player1=players[0], player2=players[1], round=1),
+            Pairing(tournament=self.tournament, player1=players[2], player2=players[3], round=1),
+        ])
+        self.url = reverse('update_results', args=[self.tournament.id])
+
+    def form(self, *tables):
+        # The form as rendered before any result: each table's scores and the previous result, all blank
+        data = {}
+        for i, (pairing, scores, previous) in enumerate(tables, start=1):
+            data[f'player1_id_1_{i}'] = pairing.player1_id
+            data[f'score1_1_{i}'], data[f'score2_1_{i}'] = scores
+            data[f'previous1_1_{i}'], data[f'previous2_1_{i}'] = previous
+        return data
+
+    def scores(self):
+        return list(Pairing.objects.order_by('id').values_list('player1_score', 'player2_score'))
+
+    def test_stale_form_does_not_overwrite_other_tables(self):
+        first, second = self.pairings
+        self.client.post(self.url, self.form((first, (2, 0), ('', '')), (second, ('', ''), ('', ''))))
+        self.client.post(self.url, self.form((first, ('', ''), ('', '')), (second, (2, 1), ('', ''))))
+        self.assertEqual(self.scores(), [(2, 0), (2, 1)])
+
+    def test_result_changed_since_render_is_kept(self):
+        first, second = self.pairings
+        self.client.post(self.url, self.form((first, (2, 0), ('', '')), (second, ('', ''), ('', ''))))
+        response = self.client.post(self.url, self.form((first, (0, 2), ('', '')), (second, ('', ''), ('', ''))),
+                                    follow=True)
+        self.assertEqual(self.scores(), [(2, 0), (None, None)])
+        self.assertContains(response, 'round 1 table 1')
+
+        # Editing from the current result goes through
+        self.client.post(self.url, self.form((first, (0, 2), (2, 0)), (second, ('', ''), ('', ''))))
+        self.assertEqual(self.scores(), [(0, 2), (None, None)])
+
+    def test_submission_key_applies_once(self):
+        first, second = self.pairings
+        response, replayed = submit_results(self.tournament, {first.id: (2, 0)}, 'key-1')
+        self.assertFalse(replayed)
+        # A retry with the same key, even carrying different scores, changes nothing and gets the first response
+        self.assertEqual(submit_results(self.tournament, {first.id: (0, 2)}, 'key-1'), (response, True))
+        self.assertEqual(self.scores(), [(2, 0), (None, None)])
+        self.assertEqual(ResultChange.objects.count(), 1)
+
+        self.assertFalse(submit_results(self.tournament, {second.id: (1, 1)}, 'key-2')[1])
+        self.assertEqual(self.scores(), [(2, 0), (1, 1)])
+
+    def test_api_refuses_a_result_for_a_bye(self):
+        player = Player.objects.create(name='Player 4', tournament=self.tournament)
+        bye = Pairing.objects.create(tournament=self.tournament, player1=player, round=1)
+        response = self.client.post(reverse('submit_match_results', args=[self.tournament.id]),
+                                    {'pairing': bye.id, 'player1_score': 0, 'player2_score': 2},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        player.refresh_from_db()
+        self.assertEqual((player.wins, player.losses, player.match_points), (0, 0, 0))
+
+
+class JobQueueTests(TestCase):
+    def test_job_of_a_dead_worker_is_failed_not_reused(self):
+        tournament = Tournament.objects.create(name='Jobs', pods=1, number_of_rounds=3)
+        job = enqueue(tournament, PAIR_ROUND)
+        self.assertEqual(claim_next(), job)
+        self.assertEqual(enqueue(tournament, PAIR_ROUND), job)
+
+        silent_since = timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS + 1)
+        Job.objects.filter(id=job.id).update(started_at=silent_since, heartbeat_at=silent_since)
+        retry = enqueue(tournament, PAIR_ROUND)
+        self.assertNotEqual(retry, job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(claim_next(), retry)
+
+    def test_long_job_that_reports_progress_stays_running(self):
+        tournament = Tournament.objects.create(name='Jobs', pods=1, number_of_rounds=3)
+        job = enqueue(tournament, PAIR_ROUND)
+        claim_next()
+        started_at = timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS + 1)
+        Job.objects.filter(id=job.id).update(started_at=started_at, heartbeat_at=started_at)
+        report(job, 50, 'Halfway')
+
+        self.assertEqual(enqueue(tournament, PAIR_ROUND), job)
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.RUNNING)
+
+
+class RebuildStandingsTests(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(name='Rebuild', pods=1, number_of_rounds=3)
+        self.players = Player.objects.bulk_create([Player(name=f'Player {i}', tournament=self.tournament)
+                                                   for i in range(4)])
+        self.pairings = Pairing.objects.bulk_create([
+            Pairing(tournament=self.tournament, player1=self.players[0], player2=self.players[1], round=1),
+            Pairing(tournament=self.tournament, player1=self.players[2], player2=self.players[3], round=1),
+        ])
+
+    def test_only_drift_is_reported(self):
+        apply_results(self.tournament, {self.pairings[0].id: (2, 0), self.pairings[1].id: (2, 1)})
+        self.assertEqual(rebuild_standings(self.tournament.id, dry_run=True), [])
+
+        Player.objects.filter(id=self.players[0].id).update(match_points=6)
+        self.assertEqual(rebuild_standings(self.tournament.id),
+                         [(self.players[0].id, 'Player 0', 'match_points', 6, 3)])
+        self.assertEqual(Player.objects.get(id=self.players[0].id).match_points, 3)
+
+    def test_never_computed_tiebreakers_are_corrected_silently(self):
+        apply_results(self.tournament, {self.pairings[0].id: (2, 0), self.pairings[1].id: (2, 1)})
+        computed = list(Player.objects.order_by('id').values_list('opponents_match_win_percentage', flat=True))
+        Player.objects.update(game_win_percentage=0.0, opponents_match_win_percentage=0.0,
+                              opponents_game_win_percentage=0.0)
+
+        self.assertEqual(rebuild_standings(self.tournament.id), [])
+        self.assertEqual(list(Player.objects.order_by('id').values_list('opponents_match_win_percentage', flat=True)),
+                         computed)
+
+    def test_submitted_tournament_results_keep_their_match_points(self):
+        self.client.post(reverse('submit_tournament_results', args=[self.tournament.id]),
+                         {f'score_{player.id}': score for player, score in zip(self.players, (2, 1, 1, 0))})
+        self.assertEqual(list(Player.objects.order_by('id').values_list('match_points', flat=True)), [6, 3, 3, 0])
+
+        self.assertEqual(rebuild_standings(self.tournament.id, dry_run=True), [])
+
+    def test_submitted_results_over_scored_pairings_keep_their_match_points(self):
+        apply_results(self.tournament, {self.pairings[0].id: (2, 0), self.pairings[1].id: (2, 1)})
+        url = reverse('submit_tournament_results', args=[self.tournament.id])
+        self.client.post(url, {f'score_{player.id}': score for player, score in zip(self.players, (2, 1, 2, 0))})
+        self.assertEqual(list(Player.objects.order_by('id').values_list('match_points', flat=True)), [9, 3, 9, 0])
+        self.assertEqual(rebuild_standings(self.tournament.id, dry_run=True), [])
+
+        # Submitting again replaces the points of the first submission instead of adding to them
+        self.client.post(url, {f'score_{player.id}': score for player, score in zip(self.players, (1, 1, 2, 0))})
+        self.assertEqual(list(Player.objects.order_by('id').values_list('match_points', flat=True)), [6, 3, 9, 0])
+        self.assertEqual(rebuild_standings(self.tournament.id, dry_run=True), [])
+
+    def test_command_needs_ids_or_all(self):
+        with self.assertRaisesMessage(CommandError, 'Give tournament ids or --all.'):
+            call_command('rebuild_standings')
+        with self.assertRaisesMessage(CommandError, 'not both'):
+            call_command('rebuild_standings', self.tournament.id, '--all')
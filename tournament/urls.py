@@ -8,9 +8,22 @@ urlpatterns = [
     path('create/', views.create_tournament, name='create_tournament'),
     path('tournaments/edit/<int:id>/', views.edit_tournament, name='edit_tournament'),
     path('tournaments/add_players/<int:id>/', views.add_players, name='add_players'),
+    path('tournaments/add_players/<int:id>/bulk/', views.bulk_add_players, name='bulk_add_players'),
     path('tournaments/delete/<int:id>/', views.delete_tournament, name='delete_tournament'),
     path('tournament/<int:id>/players/', views.tournament_players, name='tournament_players'),
+    path('tournament/<int:id>/rounds/<int:round_number>/', views.round_fragment, name='round_fragment'),
+    path('tournament/<int:id>/events/', views.tournament_events, name='tournament_events'),
+    path('tournament/<int:id>/seating/', views.seating_chart, name='seating_chart'),
+    path('tournament/<int:id>/standings/<int:round_number>/', views.tournament_standings, name='tournament_standings'),
+    path('tournament/<int:id>/export/<str:kind>/', views.export_tournament, name='export_tournament'),
     path('tournament/<int:tournament_id>/update_results/', views.update_results, name='update_results'),
+    path('tournament/<int:id>/bracket/', views.tournament_bracket, name='tournament_bracket'),
+    path('tournament/<int:tournament_id>/top_cut/', views.top_cut, name='top_cut'),
+    path('tournament/<int:tournament_id>/bracket/result/', views.record_bracket_result, name='record_bracket_result'),
+    path('tournament/<int:tournament_id>/api/results/', views.submit_match_results, name='submit_match_results'),
+    path('tournament/<int:tournament_id>/jobs/<str:kind>/', views.enqueue_job, name='enqueue_job'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
     path('tournament/<int:tournament_id>/randomize_pairings/', views.randomize_pairings, name='randomize_pairings'),
     path('tournament/<int:tournament_id>/submit_results/', views.submit_tournament_results, name='submit_tournament_results'),
 ]
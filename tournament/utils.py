@@ -1,6 +1,5 @@
-import random
-
-from tournament.models import Pairing
+from tournament.bracket import SINGLE_ELIMINATION, bracket_size
+from tournament.models import Bracket, Pairing
 
 
 def determine_number_of_rounds(num_players):
@@ -23,37 +22,18 @@ def determine_number_of_rounds(num_players):
     else:
         return 0  # Handle cases with fewer than 4 players
 
-def generate_bracket(players, pairing_method):
-    if pairing_method == 'Swiss':
-        return generate_first_round_swiss(players)
-    elif pairing_method == 'Single Elimination':
-        return generate_first_round_single_elimination(players)
-    else:
-        return []
-
-
-
-def generate_first_round_swiss(players):
-    random.shuffle(players)
-    round_matches = []
-
-    for i in range(0, len(players), 2):
-        if i + 1 < len(players):
-            p1, p2 = players[i], players[i + 1]
-            round_matches.append((p1.name, p2.name))
 
-    if len(players) % 2 == 1:
-        bye_player = players[-1]
-        round_matches.append((bye_player.name, "BYE"))
+def rounds_for(tournament, num_players):
+    # Swiss rounds for the field size, or the rounds of a single-elimination bracket
+    if tournament.pairing_method == SINGLE_ELIMINATION:
+        return (bracket_size(num_players) - 1).bit_length()
+    return determine_number_of_rounds(num_players)
 
-    return [round_matches]
 
-def generate_first_round_single_elimination(players):
-    round_matches = []
-    for i in range(0, len(players), 2):
-        if i + 1 < len(players):
-            round_matches.append((players[i].name, players[i + 1].name))
-    return [round_matches]
+def has_started(tournament):
+    # Round 1 is paired, or the bracket is seeded
+    return (Pairing.objects.filter(tournament=tournament).exists()
+            or Bracket.objects.filter(tournament=tournament).exists())
 
 
 class Player:
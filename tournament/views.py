@@ -1,17 +1,92 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.views.generic import ListView
-from .models import Tournament, Player, Pairing
-from .forms import TournamentForm, PlayerForm
+from .models import Tournament, Player, Pairing, StandingsSnapshot, Bracket, Job
+from .forms import TournamentForm, PlayerForm, BulkPlayerForm
 from django.forms import inlineformset_factory
-from .utils import generate_bracket, determine_number_of_rounds
-import random
-from django.db import models
+from .utils import has_started, rounds_for
+from .bracket import (SINGLE_ELIMINATION, TOP_CUT_SIZES, bracket_rounds, champion, create_bracket,
+                      create_top_cut, record_winner)
+from .pairing import create_first_round
+from .standings import snapshot_standings, submitted_match_points, update_standings
+from .leaderboard import bump_version, conditional_render, get_leaderboard, round_pairings, round_stamp, tournament_etag
+from .results import IDEMPOTENCY_KEY_LENGTH, parse_results, submit_results
+from .export import EXPORTS, FORMATS, stream_export
+from .events import event_stream, poll_events
+from .locks import lock_tournament, serialize_writes
+from .jobs import EXPORT, JOB_HANDLERS, PAIR_ROUND, enqueue
+from collections import Counter, defaultdict
+from functools import partial
+from django.db.models import Count, Exists, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db import transaction
+from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+import os
+from django.views.decorators.http import require_POST
+import json
+
+# Tournaments per page of the list
+TOURNAMENT_PAGE_SIZE = 50
+
 
 class TournamentListView(ListView):
+    """Tournaments newest first, paged by id cursor rather than offset.
+
+    ``?after=<id>`` shows the page of older tournaments and ``?before=<id>``
+    the newer ones, so every page is one indexed range scan however deep in
+    the archive it is. Player count, current round and whether a bracket is
+    seeded come from correlated subqueries in that same query.
+    """
     model = Tournament
     template_name = 'tournament/tournament_list.html'
     context_object_name = 'tournaments'
 
+    def get(self, request, *args, **kwargs):
+        # Any create, edit or delete changes the count or the newest timestamp
+        state = Tournament.objects.aggregate(count=Count('id'), last_modified=Max('last_modified'))
+        etag = f'list-{state["count"]}-{state["last_modified"].timestamp() if state["last_modified"] else 0}'
+        return conditional_render(request, etag, state['last_modified'],
+                                  partial(super().get, request, *args, **kwargs))
+
+    def get_queryset(self):
+        player_count = (Player.objects.filter(tournament=OuterRef('pk')).order_by()
+                        .values('tournament').annotate(count=Count('id')).values('count'))
+        current_round = (Pairing.objects.filter(tournament=OuterRef('pk')).order_by('-round')
+                         .values('round')[:1])
+        tournaments = Tournament.objects.annotate(
+            player_count=Coalesce(Subquery(player_count), 0),
+            current_round=Coalesce(Subquery(current_round), 0),
+            has_bracket=Exists(Bracket.objects.filter(tournament=OuterRef('pk')))
+        )
+
+        after, before = self.request.GET.get('after', ''), self.request.GET.get('before', '')
+        if before.isdigit():
+            # Walk towards newer tournaments, then flip the page back to newest first
+            self.direction = 'before'
+            return tournaments.filter(id__gt=int(before)).order_by('id')[:TOURNAMENT_PAGE_SIZE + 1]
+        self.direction = 'after'
+        if after.isdigit():
+            tournaments = tournaments.filter(id__lt=int(after))
+        return tournaments.order_by('-id')[:TOURNAMENT_PAGE_SIZE + 1]
+
+    def get_context_data(self, **kwargs):
+        # One extra row is fetched to tell whether another page follows
+        tournaments = list(self.object_list)
+        has_more = len(tournaments) > TOURNAMENT_PAGE_SIZE
+        tournaments = tournaments[:TOURNAMENT_PAGE_SIZE]
+        if self.direction == 'before':
+            tournaments.reverse()
+            has_newer, has_older = has_more, True
+        else:
+            has_newer, has_older = 'after' in self.request.GET, has_more
+
+        context = super().get_context_data(object_list=tournaments, **kwargs)
+        context['newer_cursor'] = tournaments[0].id if tournaments and has_newer else None
+        context['older_cursor'] = tournaments[-1].id if tournaments and has_older else None
+        return context
+
 
 def create_tournament(request):
     if request.method == 'POST':
@@ -19,39 +94,24 @@ def create_tournament(request):
         player_names = request.POST.getlist('players')
 
         if form.is_valid():
-            tournament = form.save(commit=False)
-            tournament.save()
-            players = [Player(name=name, tournament=tournament) for name in player_names if name]
-            for player in players:
-                player.save()
-
-            tournament.number_of_rounds = determine_number_of_rounds(len(players))
-            tournament.bracket = generate_bracket(players, tournament.pairing_method)
-            tournament.is_creation_phase = False
-            tournament.save()
-
-            random.shuffle(players)
-            pairings = []
-            for i in range(0, len(players), 2):
-                if i + 1 < len(players):
-                    pairings.append((players[i], players[i + 1]))
-                else:
-                    if not players[i].had_bye:
-                        pairings.append((players[i], 'Bye'))
-                        players[i].had_bye = True
-                        players[i].save()
-                    else:
-                        pairings.append((players[i], None))
-
-            for player1, player2 in pairings:
-                Pairing.objects.create(
-                    tournament=tournament,
-                    player1=player1,
-                    player2=None if player2 == 'Bye' else player2,
-                    result='2-0' if player2 == 'Bye' else None,
-                    round=1  # Set the round field to 1 for the first round
+            # Tournament, players and round 1 are written together or not at all
+            with transaction.atomic():
+                tournament = form.save(commit=False)
+                names = [name for name in player_names if name]
+                tournament.number_of_rounds = rounds_for(tournament, len(names))
+                tournament.save()
+
+                players = Player.objects.bulk_create(
+                    [Player(name=name, tournament=tournament) for name in names], batch_size=500
                 )
+                if players:
+                    start_tournament(tournament, players)
 
+            if not players:
+                # Registered on the add players page, then started from there
+                return redirect('add_players', id=tournament.id)
+            if tournament.pairing_method == SINGLE_ELIMINATION:
+                return redirect('tournament_bracket', id=tournament.id)
             return redirect('tournament_players', id=tournament.id)
     else:
         form = TournamentForm()
@@ -65,30 +125,90 @@ def edit_tournament(request, id):
         form = TournamentForm(request.POST, instance=tournament)
         if form.is_valid():
             form.save()
+            bump_version(tournament)
             return redirect('tournament_list')
     else:
         form = TournamentForm(instance=tournament)
 
     return render(request, 'tournament/edit_tournament.html', {'form': form, 'tournament': tournament})
 
+def start_tournament(tournament, players):
+    # Round 1, or the bracket seeded in the order the players were entered (shuffled by "Randomize Seating")
+    if tournament.pairing_method == SINGLE_ELIMINATION:
+        create_bracket(tournament, players)
+    else:
+        create_first_round(tournament, players)
+
+
+def update_number_of_rounds(tournament):
+    # The round count follows the field until the tournament starts
+    if not has_started(tournament):
+        tournament.number_of_rounds = rounds_for(tournament, tournament.players.count())
+        tournament.save(update_fields=['number_of_rounds'])
+
+
 def add_players(request, id):
     tournament = get_object_or_404(Tournament, id=id)
     if request.method == 'POST':
         if 'start_tournament' in request.POST:
-            players = list(tournament.player_set.all())
-            tournament.bracket = generate_bracket(players, tournament.pairing_method)
-            tournament.save()
-            return redirect('tournament_bracket', id=tournament.id)
+            with transaction.atomic():
+                lock_tournament(tournament)
+                players = list(tournament.players.order_by('id'))
+                if has_started(tournament):
+                    messages.error(request, 'This tournament has already started.')
+                    return redirect('add_players', id=tournament.id)
+                if len(players) < 2:
+                    messages.error(request, 'Register at least two players before starting.')
+                    return redirect('add_players', id=tournament.id)
+                tournament.number_of_rounds = rounds_for(tournament, len(players))
+                tournament.save(update_fields=['number_of_rounds'])
+                start_tournament(tournament, players)
+            if tournament.pairing_method == SINGLE_ELIMINATION:
+                return redirect('tournament_bracket', id=tournament.id)
+            return redirect('tournament_players', id=tournament.id)
         else:
             form = PlayerForm(request.POST)
             if form.is_valid():
-                player = form.save(commit=False)
-                player.tournament = tournament
-                player.save()
+                with transaction.atomic():
+                    player = form.save(commit=False)
+                    player.tournament = tournament
+                    player.save()
+                    update_number_of_rounds(tournament)
+                    bump_version(tournament)
                 return redirect('add_players', id=tournament.id)
     else:
         form = PlayerForm()
-    return render(request, 'tournament/add_players.html', {'form': form, 'tournament': tournament})
+    return render(request, 'tournament/add_players.html', {
+        'form': form,
+        'bulk_form': BulkPlayerForm(),
+        'tournament': tournament,
+        'has_started': has_started(tournament)
+    })
+
+def bulk_add_players(request, id):
+    tournament = get_object_or_404(Tournament, id=id)
+    if request.method == 'POST':
+        form = BulkPlayerForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Names already registered are dropped, the rest is inserted in batches in one transaction
+            existing = {name.casefold() for name in tournament.players.values_list('name', flat=True)}
+            names = [name for name in form.cleaned_data['player_names'] if name.casefold() not in existing]
+            with transaction.atomic():
+                Player.objects.bulk_create(
+                    [Player(name=name, tournament=tournament) for name in names], batch_size=500
+                )
+                update_number_of_rounds(tournament)
+                bump_version(tournament)
+            messages.success(request, f'Registered {len(names)} players.')
+            return redirect('add_players', id=tournament.id)
+    else:
+        form = BulkPlayerForm()
+    return render(request, 'tournament/add_players.html', {
+        'form': PlayerForm(),
+        'bulk_form': form,
+        'tournament': tournament,
+        'has_started': has_started(tournament)
+    })
 
 def delete_tournament(request, id):
     tournament = get_object_or_404(Tournament, id=id)
@@ -99,292 +219,362 @@ def delete_tournament(request, id):
 
 def tournament_bracket(request, id):
     tournament = get_object_or_404(Tournament, id=id)
-    return render(request, 'tournament/tournament_bracket.html', {'tournament': tournament})
+
+    def render_bracket():
+        # The whole tree, names included, is one row
+        bracket = Bracket.objects.filter(tournament=tournament).first()
+        return render(request, 'tournament/tournament_bracket.html', {
+            'tournament': tournament,
+            'bracket': bracket_rounds(bracket) if bracket else None,
+            'champion': champion(bracket) if bracket else None
+        })
+
+    return conditional_render(request, tournament_etag(tournament), tournament.last_modified, render_bracket)
+
+
+def top_cut(request, tournament_id):
+    tournament = get_object_or_404(Tournament, id=tournament_id)
+    if request.method == 'POST':
+        if not tournament.is_ended:
+            messages.error(request, 'The Swiss rounds have not finished yet.')
+            return redirect('tournament_players', id=tournament.id)
+        try:
+            create_top_cut(tournament, int(request.POST.get('size', 0)), reset='reset' in request.POST)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('tournament_players', id=tournament.id)
+    return redirect('tournament_bracket', id=tournament.id)
+
+
+@serialize_writes
+def record_bracket_result(request, tournament_id):
+    tournament = get_object_or_404(Tournament, id=tournament_id)
+    if request.method == 'POST':
+        bracket = get_object_or_404(Bracket, tournament=tournament)
+        try:
+            with transaction.atomic():
+                record_winner(bracket, int(request.POST.get('node', 0)), int(request.POST.get('winner', 0)))
+                if tournament.pairing_method == SINGLE_ELIMINATION:
+                    # Ended once the final has a winner; correcting an earlier match reopens it
+                    tournament.is_ended = champion(bracket) is not None
+                    tournament.save(update_fields=['is_ended'])
+                bump_version(tournament)
+        except ValueError as e:
+            messages.error(request, str(e))
+    return redirect('tournament_bracket', id=tournament.id)
 
 
 def tournament_players(request, id):
     tournament = get_object_or_404(Tournament, id=id)
-    players = list(tournament.players.all())
 
-    # Ensure that players have their GWP calculated before sorting
-    for player in players:
-        player.calculate_gwp()  # Ensure the GWP is up-to-date
+    def render_players():
+        # Standings and pairings only change on writes, which bump the tournament version
+        leaderboard = get_leaderboard(tournament)
+        is_last_round = leaderboard['current_round'] == tournament.number_of_rounds
+
+        current_round = leaderboard['current_round']
+        job = request.GET.get('job', '')
+
+        # Only the current round is rendered here; earlier rounds load on demand from round_fragment
+        return render(request, 'tournament/tournament_players.html', {
+            'tournament': tournament,
+            'players': leaderboard['players'],
+            'current_round': current_round,
+            'earlier_rounds': range(1, current_round),
+            'round_number': current_round,
+            'pairs': partial(round_pairings, tournament, current_round),
+            'round_stamp': round_stamp(tournament, current_round),
+            'is_last_round': is_last_round,
+            'can_pair_next_round': (current_round and not tournament.is_ended
+                                    and tournament.pairing_method != SINGLE_ELIMINATION),
+            'job_url': reverse('job_status', args=[int(job)]) if job.isdigit() else None,
+            'top_cut_sizes': [size for size in TOP_CUT_SIZES if size <= len(leaderboard['players'])],
+            'has_top_cut': tournament.is_ended and Bracket.objects.filter(tournament=tournament).exists()
+        })
+
+    return conditional_render(request, tournament_etag(tournament), tournament.last_modified, render_players)
+
+
+def round_fragment(request, id, round_number):
+    tournament = get_object_or_404(Tournament, id=id)
+
+    def render_round():
+        current_round = get_leaderboard(tournament)['current_round']
+        if not 1 <= round_number <= current_round:
+            raise Http404('No such round.')
+        # ``pairs`` is only called when the round's rows are not cached yet
+        return render(request, 'tournament/round_pairings.html', {
+            'tournament': tournament,
+            'round_number': round_number,
+            'current_round': current_round,
+            'pairs': partial(round_pairings, tournament, round_number),
+            'round_stamp': round_stamp(tournament, round_number)
+        })
+
+    etag = f'{tournament_etag(tournament)}-r{round_number}'
+    return conditional_render(request, etag, tournament.last_modified, render_round)
+
+
+async def tournament_events(request, id):
+    # Server-Sent Events: one long-lived connection per viewer instead of repeated page loads
+    tournament = await aget_object_or_404(Tournament, id=id)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+    # The version the viewer's page was rendered at
+    version = request.GET.get('version', '')
+    version = int(version) if version.isdigit() else tournament.version
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(event_stream(id, last_event_id, version), content_type='text/event-stream')
+    else:
+        # A WSGI worker would be tied up for the whole stream, so each request is a long-poll instead
+        response = HttpResponse(await poll_events(id, last_event_id, version), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def seating_chart(request, id):
+    tournament = get_object_or_404(Tournament, id=id)
+
+    pods = defaultdict(list)
+    seats = tournament.players.filter(seat__isnull=False).order_by('pod', 'seat').values_list('pod', 'seat', 'name')
+    for pod, seat, name in seats:
+        pods[pod].append((seat, name))
 
-    # Sort players by match points first, then by game-win percentage (GWP)
-    players.sort(key=lambda player: (player.match_points, player.game_win_percentage or 0), reverse=True)
+    return render(request, 'tournament/seating_chart.html', {
+        'tournament': tournament,
+        'pods': sorted(pods.items())
+    })
 
-    # Retrieve pairings and group them by round
-    pairings = Pairing.objects.filter(tournament=tournament).order_by('round', 'id')
-    pairings_by_round = {}
-    for pairing in pairings:
-        round_number = pairing.round
-        if round_number not in pairings_by_round:
-            pairings_by_round[round_number] = []
-        pairings_by_round[round_number].append(pairing)
 
-    current_round = max(pairings_by_round.keys(), default=0)
-    is_last_round = current_round == tournament.number_of_rounds
+def tournament_standings(request, id, round_number):
+    tournament = get_object_or_404(Tournament, id=id)
+
+    # Closed rounds are read straight from their snapshot, in stored order
+    standings = (StandingsSnapshot.objects.filter(tournament=tournament, round=round_number)
+                 .select_related('player').order_by('position'))
+    rounds = (StandingsSnapshot.objects.filter(tournament=tournament, position=1)
+              .order_by('round').values_list('round', flat=True))
 
-    return render(request, 'tournament/tournament_players.html', {
+    return render(request, 'tournament/tournament_standings.html', {
         'tournament': tournament,
-        'players': players,
-        'pairings_by_round': pairings_by_round,
-        'is_last_round': is_last_round
+        'round_number': round_number,
+        'standings': standings,
+        'rounds': rounds
     })
 
 
+def export_tournament(request, id, kind):
+    tournament = get_object_or_404(Tournament, id=id)
+    export_format = request.GET.get('format', 'csv')
+    if kind not in EXPORTS or export_format not in FORMATS:
+        raise Http404('Unknown export.')
+
+    columns, rows = EXPORTS[kind]
+    if kind == 'pairings' and request.GET.get('round', '').isdigit():
+        rows = rows(tournament, int(request.GET['round']))
+    else:
+        rows = rows(tournament)
+
+    # Rows are streamed as they are read, so large events are never held in memory
+    response = StreamingHttpResponse(stream_export(export_format, columns, rows), content_type=FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="tournament_{tournament.id}_{kind}.{export_format}"'
+    return response
+
+
+@serialize_writes
 def update_results(request, tournament_id):
     if request.method == 'POST':
         tournament = get_object_or_404(Tournament, id=tournament_id)
-        pairings = Pairing.objects.filter(tournament=tournament)
 
-        for round_number in range(1, tournament.number_of_rounds + 1):
-            for i, pair in enumerate(pairings.filter(round=round_number), start=1):
+        # Only the rounds present in the submitted form are looked at
+        submitted_rounds = {
+            int(key.split('_')[2]) for key in request.POST
+            if key.startswith('player1_id_') and key.split('_')[2].isdigit()
+        }
+
+        with transaction.atomic():
+            lock_tournament(tournament)
+            rows = (Pairing.objects.filter(tournament=tournament, round__in=submitted_rounds)
+                    .order_by('round', 'id')
+                    .values_list('id', 'round', 'player1_id', 'player1_score', 'player2_score', 'results_submitted'))
+
+            # Form rows are numbered per round in pairing order
+            results = {}
+            conflicts = []
+            table_numbers = defaultdict(int)
+            for pairing_id, round_number, pairing_player1_id, stored1, stored2, submitted in rows:
+                table_numbers[round_number] += 1
+                i = table_numbers[round_number]
                 player1_id = request.POST.get(f'player1_id_{round_number}_{i}')
-                player2_id = request.POST.get(f'player2_id_{round_number}_{i}')
-                score1 = request.POST.get(f'score1_{round_number}_{i}')
-                score2 = request.POST.get(f'score2_{round_number}_{i}')
-
-                if player1_id:
-                    player1 = Player.objects.get(id=player1_id)
-                    player2 = Player.objects.get(id=player2_id) if player2_id and player2_id != 'Bye' else None
-
-                    new_score1 = int(score1) if score1 else None
-                    new_score2 = int(score2) if score2 else None
-
-                    # Reset previous match points, wins/losses/draws
-                    if pair.result and not pair.was_bye:
-                        if pair.player1_score is not None and pair.player2_score is not None:
-                            if pair.player1_score > pair.player2_score:
-                                player1.match_points -= 3
-                                player1.wins -= 1
-                                if player2:
-                                    player2.losses -= 1
-                            elif pair.player2_score > pair.player1_score:
-                                player2.match_points -= 3
-                                player2.wins -= 1
-                                player1.losses -= 1
-                            elif pair.player1_score == pair.player2_score:
-                                player1.match_points -= 1
-                                player1.draws -= 1
-                                if player2:
-                                    player2.match_points -= 1
-                                    player2.draws -= 1
-
-                    # Handle Bye round (automatic 2-0 win for Player1)
-                    if player2_id == 'Bye':
-                        pair.player2 = None
-                        pair.result = '2-0'
-                        pair.was_bye = True
-                        player1.match_points += 3
-                        player1.wins += 1
-                        player1.had_bye = True
-                        player1.games_won += 2
-                        player1.games_lost += 0
-                        player1.calculate_gwp()
-                        print(f"Player {player1.name} had a Bye. Match points: {player1.match_points}, Wins: {player1.wins}")
-
-                    # Handle valid score submissions
-                    elif new_score1 is not None and new_score2 is not None:
-                        print(f"Processing pair {i} in round {round_number}")
-                        print(f"Player 1 ID: {player1_id}, Player 2 ID: {player2_id}, Score1: {new_score1}, Score2: {new_score2}")
-
-                        if new_score1 == new_score2:
-                            pair.player1_score = new_score1
-                            pair.player2_score = new_score2
-                            pair.result = f'{new_score1}-{new_score2}'
-                            pair.results_submitted = True
-                            player1.match_points += 1
-                            player1.draws += 1
-                            player1.games_won += new_score1
-                            player1.games_lost += new_score2
-                            if player2:
-                                player2.match_points += 1
-                                player2.draws += 1
-                                player2.games_won += new_score2
-                                player2.games_lost += new_score1
-                            player1.calculate_gwp()
-                            if player2:
-                                player2.calculate_gwp()
-
-                        elif new_score1 > new_score2:
-                            pair.player1_score = new_score1
-                            pair.player2_score = new_score2
-                            pair.result = f'{new_score1}-{new_score2}'
-                            pair.results_submitted = True
-                            player1.match_points += 3
-                            player1.wins += 1
-                            player1.games_won += new_score1
-                            player1.games_lost += new_score2
-                            if player2:
-                                player2.losses += 1
-                                player2.games_lost += new_score1
-                                player2.games_won += new_score2
-                            player1.calculate_gwp()
-                            if player2:
-                                player2.calculate_gwp()
-
-                        elif new_score2 > new_score1:
-                            pair.player1_score = new_score1
-                            pair.player2_score = new_score2
-                            pair.result = f'{new_score1}-{new_score2}'
-                            pair.results_submitted = True
-                            if player2:
-                                player2.match_points += 3
-                                player2.wins += 1
-                                player2.games_won += new_score2
-                                player2.games_lost += new_score1
-                                player1.losses += 1
-                                player1.games_lost += new_score2
-                                player1.games_won += new_score1
-                            player1.calculate_gwp()
-                            if player2:
-                                player2.calculate_gwp()
-
-                    pair.save()
-                    player1.save()
-                    if player2:
-                        player2.save()
-
-        # Calculate OMP and OGP for each player after all pairings have been processed
-        players = Player.objects.filter(tournament=tournament)
-        for player in players:
-            player.calculate_omp()
-            player.calculate_ogp()
-
-        # Show updated leaderboard
-        print("Updated leaderboard:")
-        for player in players:
-            print(f"Player {player.name}: Match points: {player.match_points}, Wins: {player.wins}, Draws: {player.draws}, GWP: {player.game_win_percentage:.2f}%, OMP: {player.opponents_match_win_percentage:.2f}%, OGP: {player.opponents_game_win_percentage:.2f}%, Had bye: {player.had_bye}")
-
+                scores = (request.POST.get(f'score1_{round_number}_{i}', ''),
+                          request.POST.get(f'score2_{round_number}_{i}', ''))
+                previous = (request.POST.get(f'previous1_{round_number}_{i}', ''),
+                            request.POST.get(f'previous2_{round_number}_{i}', ''))
+
+                # Skip rows that don't line up with the stored pairing (e.g. pairings changed since render),
+                # rows left blank and rows nobody changed
+                if player1_id != str(pairing_player1_id) or not all(score.isdigit() for score in scores):
+                    continue
+                stored = (str(stored1), str(stored2)) if submitted else ('', '')
+                if scores in (previous, stored):
+                    continue
+                # Someone else reported this table after the page was rendered; theirs stands
+                if previous != stored:
+                    conflicts.append(f'round {round_number} table {i}')
+                    continue
+                results[pairing_id] = (int(scores[0]), int(scores[1]))
+
+            # The form carries a key per page load, so a double click or a resent POST counts once
+            key = request.POST.get('submission_key', '')[:IDEMPOTENCY_KEY_LENGTH]
+            submit_results(tournament, results, key)
+
+        if conflicts:
+            messages.warning(request, f'Not saved, reported by someone else since this page was loaded: '
+                                      f'{", ".join(conflicts)}. Check the current result and edit it if needed.')
         return redirect('tournament_players', id=tournament_id)
 
+@require_POST
+@serialize_writes
+def submit_match_results(request, tournament_id):
+    # JSON API for one result or a small batch; only the reported matches are touched
+    tournament = get_object_or_404(Tournament, id=tournament_id)
+    key = request.headers.get('Idempotency-Key', '')
+    if len(key) > IDEMPOTENCY_KEY_LENGTH:
+        return JsonResponse({'error': f'Idempotency-Key is longer than {IDEMPOTENCY_KEY_LENGTH} characters.'},
+                            status=400)
+    try:
+        results = parse_results(json.loads(request.body), tournament.best_of)
+    except (ValueError, UnicodeDecodeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    with transaction.atomic():
+        known = dict(Pairing.objects.filter(tournament=tournament, id__in=list(results))
+                     .values_list('id', 'player2_id'))
+        unknown = sorted(set(results) - set(known))
+        if unknown:
+            return JsonResponse({'error': f'Unknown pairing {", ".join(map(str, unknown))} for this tournament.'},
+                                status=404)
+        byes = sorted(pairing_id for pairing_id, player2_id in known.items() if player2_id is None)
+        if byes:
+            return JsonResponse({'error': f'Pairing {", ".join(map(str, byes))} is a bye and takes no result.'},
+                                status=400)
+        response, replayed = submit_results(tournament, results, key)
+
+    response = JsonResponse(response)
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+@serialize_writes
 def randomize_pairings(request, tournament_id):
     tournament = get_object_or_404(Tournament, id=tournament_id)
     players = list(tournament.players.all())
-    random.shuffle(players)
-    pairings = []
-    for i in range(0, len(players), 2):
-        if i + 1 < len(players):
-            pairings.append((players[i], players[i + 1]))
-        else:
-            if not players[i].had_bye:
-                pairings.append((players[i], 'Bye'))
-                players[i].had_bye = True
-                players[i].save()
-            else:
-                pairings.append((players[i], None))
-
-    Pairing.objects.filter(tournament=tournament).delete()
-    for player1, player2 in pairings:
-        Pairing.objects.create(
-            tournament=tournament,
-            player1=player1,
-            player2=None if player2 == 'Bye' else player2,
-            result='2-0' if player2 == 'Bye' else None
-        )
 
-    return redirect('tournament_players', id=tournament_id)
-
-def create_new_round(tournament):
-    current_round = Pairing.objects.filter(tournament=tournament).aggregate(models.Max('round'))['round__max'] + 1
-
-    if current_round > tournament.number_of_rounds:
-        tournament.is_ended = True
-        tournament.save()
-        return
+    with transaction.atomic():
+        lock_tournament(tournament)
+        Pairing.objects.filter(tournament=tournament).delete()
+        create_first_round(tournament, players)
 
-    players = list(tournament.players.all())
-    players.sort(key=lambda p: p.match_points, reverse=True)
-
-    pairings = []
-    paired_players = set()
-    bye_assigned = False
-
-    for i in range(len(players)):
-        if players[i] in paired_players:
-            continue
-        for j in range(i + 1, len(players)):
-            if players[j] not in paired_players and not have_played_before(players[i], players[j], tournament):
-                pairings.append((players[i], players[j]))
-                paired_players.add(players[i])
-                paired_players.add(players[j])
-                break
-        else:
-            if not bye_assigned and not players[i].had_bye:
-                pairings.append((players[i], 'Bye'))
-                paired_players.add(players[i])
-                players[i].had_bye = True
-                players[i].save()
-                bye_assigned = True
-            else:
-                pairings.append((players[i], None))
-
-    for player1, player2 in pairings:
-        Pairing.objects.create(
-            tournament=tournament,
-            player1=player1,
-            player2=None if player2 == 'Bye' else player2,
-            result='2-0' if player2 == 'Bye' else None,
-            round=current_round
-        )
-
-def has_had_bye(player, tournament):
-    return Pairing.objects.filter(
-        tournament=tournament,
-        player1=player,
-        player2=None,
-        result='2-0'
-    ).exists()
-
-
-def have_played_before(player1, player2, tournament):
-    return Pairing.objects.filter(
-        tournament=tournament,
-        player1=player1,
-        player2=player2
-    ).exists() or Pairing.objects.filter(
-        tournament=tournament,
-        player1=player2,
-        player2=player1
-    ).exists()
+    return redirect('tournament_players', id=tournament_id)
 
 
+@serialize_writes
 def submit_tournament_results(request, tournament_id):
     if request.method == 'POST':
         tournament = get_object_or_404(Tournament, id=tournament_id)
-        pairings = Pairing.objects.filter(tournament=tournament)
 
-        for round_number in range(1, tournament.number_of_rounds + 1):
-            for i, pair in enumerate(pairings.filter(round=round_number), start=1):
-                player1_score_str = request.POST.get(f'score_{pair.player1.id}', '0')
-                player2_score_str = request.POST.get(f'score_{pair.player2.id}', '0') if pair.player2 else '0'
+        with transaction.atomic():
+            lock_tournament(tournament)
+            pairings = list(Pairing.objects.filter(tournament=tournament,
+                                                   round__range=(1, tournament.number_of_rounds)))
+
+            match_points = Counter()
+            changed = []
+            for pair in pairings:
+                player1_score_str = request.POST.get(f'score_{pair.player1_id}', '0')
+                player2_score_str = request.POST.get(f'score_{pair.player2_id}', '0') if pair.player2_id else '0'
 
                 player1_score = int(player1_score_str) if player1_score_str.isdigit() else 0
                 player2_score = int(player2_score_str) if player2_score_str.isdigit() else 0
 
-                # Apply new results
-                pair.result = f'{player1_score}-{player2_score}'
+                # A result that already reads this way is left alone; a new one replaces the points of the last
+                result = f'{player1_score}-{player2_score}'
+                if pair.results_submitted and pair.result == result:
+                    continue
+                previous = (submitted_match_points(pair.result, pair.player1_score, pair.player2_score)
+                            if pair.results_submitted else (0, 0))
+                pair.result = result
                 pair.results_submitted = True
-                pair.save()
+                changed.append(pair)
 
-                if player1_score == 1:
-                    pair.player1.match_points += 3
-                elif player1_score == 2:
-                    pair.player1.match_points += 6
+                awarded = submitted_match_points(result, pair.player1_score, pair.player2_score)
+                match_points[pair.player1_id] += awarded[0] - previous[0]
+                if pair.player2_id:
+                    match_points[pair.player2_id] += awarded[1] - previous[1]
 
-                if pair.player2:
-                    if player2_score == 1:
-                        pair.player2.match_points += 3
-                    elif player2_score == 2:
-                        pair.player2.match_points += 6
+            players = list(Player.objects.filter(id__in=list(match_points)))
+            for player in players:
+                player.match_points += match_points[player.id]
 
-                pair.player1.save()
-                if pair.player2:
-                    pair.player2.save()
+            Pairing.objects.bulk_update(changed, ['result', 'results_submitted'], batch_size=500)
+            Player.objects.bulk_update(players, ['match_points'], batch_size=500)
+            update_standings(tournament)
+            snapshot_standings(tournament, tournament.number_of_rounds)
 
-        tournament.is_ended = True
-        tournament.save()
+            tournament.is_ended = True
+            tournament.save()
+            bump_version(tournament)
         return redirect('tournament_list')
 
 
+@require_POST
+def enqueue_job(request, tournament_id, kind):
+    # Heavy operations run in the run_jobs worker; the client gets a job to poll instead of waiting
+    tournament = get_object_or_404(Tournament, id=tournament_id)
+    if kind not in JOB_HANDLERS:
+        raise Http404('Unknown job.')
+    arguments = {}
+    if kind == EXPORT:
+        arguments = {'kind': request.POST.get('kind', 'standings'), 'format': request.POST.get('format', 'csv')}
+        if arguments['kind'] not in EXPORTS or arguments['format'] not in FORMATS:
+            return JsonResponse({'error': 'Unknown export.'}, status=400)
+
+    if kind == PAIR_ROUND and (tournament.is_ended or tournament.pairing_method == SINGLE_ELIMINATION):
+        return JsonResponse({'error': 'This tournament has no further Swiss rounds to pair.'}, status=400)
+
+    job = enqueue(tournament, kind, arguments)
+    if request.accepts('application/json') and not request.accepts('text/html'):
+        return JsonResponse(job_payload(job), status=202)
+
+    # The page polls the job and reloads once it is done
+    return redirect(f'{reverse("tournament_players", args=[tournament_id])}?job={job.id}')
+
+
+def job_status(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    return JsonResponse(job_payload(job))
+
+
+def job_download(request, job_id):
+    job = get_object_or_404(Job, id=job_id, status=Job.DONE)
+    if not job.output_path or not os.path.exists(job.output_path):
+        raise Http404('This job has no file to download.')
+    return FileResponse(open(job.output_path, 'rb'), as_attachment=True, filename=os.path.basename(job.output_path))
+
+
+def job_payload(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'tournament': job.tournament_id,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'result': job.result,
+        'error': job.error.strip().splitlines()[-1] if job.error else None,
+        'status_url': reverse('job_status', args=[job.id]),
+        'download_url': reverse('job_download', args=[job.id]) if job.output_path else None,
+    }
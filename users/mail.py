@@ -0,0 +1,17 @@
+from django.conf import settings
+
+from .models import OutboundEmail
+
+
+def queue_mail(subject, message, from_email, recipient_list, html_message=None):
+    """Queue an email for the send_queued_mail worker; same arguments as ``send_mail``.
+
+    The request only writes one row, so it never waits on the SMTP server.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list)
+    )
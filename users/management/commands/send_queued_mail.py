@@ -0,0 +1,125 @@
+import smtplib
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import OutboundEmail
+
+# Seconds to wait before retry n is 2 ** n times this, so 1, 2, 4, 8... minutes
+RETRY_BASE_SECONDS = 30
+
+# A claimed message is hidden from other workers for this long; if its worker dies it is due again after
+CLAIM_SECONDS = 600
+
+
+class Command(BaseCommand):
+    help = ('Send queued emails in batches over one SMTP connection, retrying failures with backoff. '
+            'Runs until stopped, or drains the queue once with --once.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send what is due and exit.')
+        parser.add_argument('--batch-size', type=int, default=100, help='Messages sent per connection.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--max-attempts', type=int, default=5,
+                            help='Attempts before a message is marked failed for good.')
+        parser.add_argument('--host', help='SMTP host (default: EMAIL_HOST).')
+        parser.add_argument('--port', type=int, help='SMTP port (default: EMAIL_PORT).')
+        parser.add_argument('--no-tls', action='store_true',
+                            help='Plain SMTP without login, e.g. for a local debugging server: '
+                                 'python -m aiosmtpd -n -l localhost:1025')
+
+    def handle(self, *args, **options):
+        connection_options = {}
+        if options['host']:
+            connection_options['host'] = options['host']
+        if options['port']:
+            connection_options['port'] = options['port']
+        if options['no_tls']:
+            connection_options.update(use_tls=False, use_ssl=False, username='', password='')
+
+        while True:
+            sent = self.send_batch(options['batch_size'], options['max_attempts'], connection_options)
+            if options['once'] and sent < options['batch_size']:
+                break
+            if not sent:
+                time.sleep(options['interval'])
+
+    def claim(self, batch_size):
+        # Due messages, each leased by pushing next_attempt_at out; the conditional update keeps two workers
+        # off the same message, the same way tournament.jobs.claim_next does
+        now = timezone.now()
+        lease = now + timedelta(seconds=CLAIM_SECONDS)
+        claimed = []
+        due = (OutboundEmail.objects.filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+               .order_by('next_attempt_at', 'id')[:batch_size])
+        for email in due:
+            if OutboundEmail.objects.filter(id=email.id, status=OutboundEmail.PENDING,
+                                            next_attempt_at=email.next_attempt_at).update(next_attempt_at=lease):
+                email.next_attempt_at = lease
+                claimed.append(email)
+        return claimed
+
+    def send_batch(self, batch_size, max_attempts, connection_options):
+        # Returns how many messages were claimed, sent or not
+        due = self.claim(batch_size)
+        if not due:
+            return 0
+
+        connection = get_connection(fail_silently=False, **connection_options)
+        try:
+            connection.open()
+        except (smtplib.SMTPException, OSError) as e:
+            for email in due:
+                self.failed(email, e, max_attempts)
+            return len(due)
+
+        sent = 0
+        remaining = iter(due)
+        try:
+            for email in remaining:
+                try:
+                    connection.send_messages([self.message(email, connection)])
+                except smtplib.SMTPServerDisconnected as e:
+                    # Reconnect once for the rest of the batch
+                    self.failed(email, e, max_attempts)
+                    connection.close()
+                    connection.open()
+                except (smtplib.SMTPException, OSError) as e:
+                    self.failed(email, e, max_attempts)
+                else:
+                    email.status = OutboundEmail.SENT
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+                    sent += 1
+        except (smtplib.SMTPException, OSError) as e:
+            # The connection could not be reopened; the rest of the batch backs off like any failed send
+            self.stderr.write(f'SMTP connection lost: {e}')
+            for email in remaining:
+                self.failed(email, e, max_attempts)
+        finally:
+            connection.close()
+
+        self.stdout.write(f'Sent {sent} of {len(due)} due messages.')
+        return len(due)
+
+    def message(self, email, connection):
+        message = EmailMultiAlternatives(email.subject, email.body, email.from_email, email.to,
+                                         connection=connection)
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        return message
+
+    def failed(self, email, error, max_attempts):
+        email.attempts += 1
+        email.last_error = str(error)
+        if email.attempts >= max_attempts:
+            email.status = OutboundEmail.FAILED
+        else:
+            email.next_attempt_at = timezone.now() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** email.attempts)
+        email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+        self.stderr.write(f'Could not send "{email.subject}" (attempt {email.attempts}): {error}')
@@ -1,3 +1,34 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class OutboundEmail(models.Model):
+    # A queued email, sent by the send_queued_mail worker instead of inside the request
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField()  # List of recipient addresses
+    status = models.CharField(
+        max_length=10,
+        choices=[(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')],
+        default=PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue scan: due pending messages, oldest first
+            models.Index(fields=['status', 'next_attempt_at'], name='outboundemail_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} to {", ".join(self.to)}'
@@ -1,3 +1,76 @@
+import smtplib
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from .mail import queue_mail
+from .management.commands.send_queued_mail import Command
+from .models import OutboundEmail
+
+
+class OutboundEmailQueueTests(TestCase):
+    def send_queued_mail(self):
+        call_command('send_queued_mail', '--once', stdout=mock.Mock(), stderr=mock.Mock())
+
+    def test_register_queues_instead_of_sending(self):
+        self.client.post(reverse('register'), {
+            'username': 'player',
+            'email': 'player@example.com',
+            'first_name': 'Jace',
+            'last_name': 'Beleren',
+            'password1': 'a-long-Passw0rd!',
+            'password2': 'a-long-Passw0rd!',
+        })
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.to, ['player@example.com'])
+
+        self.send_queued_mail()
+        self.assertEqual(len(mail.outbox), 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.SENT)
+
+    def test_batch_uses_one_connection(self):
+        for i in range(3):
+            queue_mail(f'Message {i}', 'Body', 'admin@example.com', [f'player{i}@example.com'])
+        with mock.patch('users.management.commands.send_queued_mail.get_connection',
+                        wraps=mail.get_connection) as get_connection:
+            self.send_queued_mail()
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failures_are_retried_then_given_up(self):
+        email = queue_mail('Hello', 'Body', 'admin@example.com', ['player@example.com'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            self.send_queued_mail()
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), (OutboundEmail.PENDING, 1, 'down'))
+            self.assertGreater(email.next_attempt_at, email.created_at)
+
+            email.attempts = 4
+            email.next_attempt_at = email.created_at
+            email.save()
+            self.send_queued_mail()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboundEmail.FAILED, 5))
+
+    def test_claimed_messages_are_skipped_by_other_workers(self):
+        email = queue_mail('Hello', 'Body', 'admin@example.com', ['player@example.com'])
+        self.assertEqual(Command().claim(10), [email])
+        self.send_queued_mail()
+        self.assertEqual(len(mail.outbox), 0)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.PENDING)
 
-# Create your tests here.
+    def test_failed_reconnect_backs_off_the_rest_of_the_batch(self):
+        emails = [queue_mail(f'Message {i}', 'Body', 'admin@example.com', ['player@example.com']) for i in range(3)]
+        backend = 'django.core.mail.backends.locmem.EmailBackend'
+        with mock.patch(f'{backend}.send_messages', side_effect=smtplib.SMTPServerDisconnected('gone')), \
+                mock.patch(f'{backend}.open', side_effect=[None, OSError('refused')]):
+            self.send_queued_mail()
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutboundEmail.PENDING, 1))
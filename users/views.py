@@ -1,7 +1,7 @@
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import authenticate, login as auth_login
 from django.contrib.auth.decorators import login_required
-from django.core.mail import send_mail
+from .mail import queue_mail
 from django.template.loader import render_to_string
 from django.contrib.sites.shortcuts import get_current_site
 from django.conf import settings
@@ -39,12 +39,11 @@ def register(request):
                 'verification_link': verification_link
             })
 
-            send_mail(
+            queue_mail(
                 mail_subject,
                 '',
                 'admin@yourdomain.com',
                 [form.cleaned_data['email']],
-                fail_silently=False,
                 html_message=message
             )
 
@@ -145,7 +144,7 @@ def send_activation_email(user, request):
     print(f"UID: {uid}")
     print(f"Token: {token}")
 
-    send_mail(mail_subject, message, settings.EMAIL_HOST_USER, [user.email])
+    queue_mail(mail_subject, message, settings.EMAIL_HOST_USER, [user.email])
 
 
 
@@ -167,12 +166,11 @@ def resend_activation_email(request):
                     'verification_link': verification_link
                 })
 
-                send_mail(
+                queue_mail(
                     mail_subject,
                     '',
                     'admin@mtgtournament.com',
                     [email],
-                    fail_silently=False,
                     html_message=message
                 )
 